@@ -1,5 +1,6 @@
 ﻿from dataclasses import dataclass
 import os
+import tempfile
 
 
 @dataclass(frozen=True)
@@ -7,8 +8,50 @@ class Settings:
     app_name: str = os.getenv("APP_NAME", "School Bus Tracking System")
     secret_key: str = os.getenv("SECRET_KEY", "change-me-in-production")
     database_url: str = os.getenv("DATABASE_URL", "sqlite:///./sbt.db")
+    database_profile: str = os.getenv("DATABASE_PROFILE", "default")
+    database_read_pool_size: int = int(os.getenv("DATABASE_READ_POOL_SIZE", "5"))
+    sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    sqlite_cache_size: int = int(os.getenv("SQLITE_CACHE_SIZE", "-64000"))
     default_speed_kmh: float = float(os.getenv("DEFAULT_SPEED_KMH", "25"))
     alert_threshold_meters: float = float(os.getenv("ALERT_THRESHOLD_METERS", "250"))
+    db_executor_workers: int = int(os.getenv("DB_EXECUTOR_WORKERS", "1"))
+    db_executor_max_pending: int = int(os.getenv("DB_EXECUTOR_MAX_PENDING", "256"))
+    progress_search_window: int = int(os.getenv("PROGRESS_SEARCH_WINDOW", "2"))
+    progress_hysteresis_meters: float = float(os.getenv("PROGRESS_HYSTERESIS_METERS", "25"))
+    progress_resync_meters: float = float(os.getenv("PROGRESS_RESYNC_METERS", "500"))
+    ws_send_queue_size: int = int(os.getenv("WS_SEND_QUEUE_SIZE", "16"))
+    ws_send_policy: str = os.getenv("WS_SEND_POLICY", "drop_oldest")
+    ws_send_timeout_seconds: float = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+    ws_watch_active_seconds: float = float(os.getenv("WS_WATCH_ACTIVE_SECONDS", "300"))
+    broadcast_backend: str = os.getenv("BROADCAST_BACKEND", "memory")
+    broadcast_socket_dir: str = os.getenv("BROADCAST_SOCKET_DIR", os.path.join(tempfile.gettempdir(), "sbt-broadcast"))
+    gps_min_interval_seconds: float = float(os.getenv("GPS_MIN_INTERVAL_SECONDS", "1"))
+    gps_min_distance_meters: float = float(os.getenv("GPS_MIN_DISTANCE_METERS", "10"))
+    gps_max_staleness_seconds: float = float(os.getenv("GPS_MAX_STALENESS_SECONDS", "30"))
+    page_size_default: int = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+    page_size_max: int = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+    export_chunk_size: int = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+    bulk_import_chunk_size: int = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", "1000"))
+    bulk_import_max_rows: int = int(os.getenv("BULK_IMPORT_MAX_ROWS", "50000"))
+    dashboard_cache_ttl_seconds: float = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "5"))
+    auth_cache_ttl_seconds: float = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+    password_hash_iterations: int = int(os.getenv("PASSWORD_HASH_ITERATIONS", "100000"))
+    password_pool_workers: int = int(os.getenv("PASSWORD_POOL_WORKERS", "2"))
+    password_pool_max_pending: int = int(os.getenv("PASSWORD_POOL_MAX_PENDING", "32"))
+    password_hash_timeout_seconds: float = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "10"))
+    metrics_enabled: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    debug: bool = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+    sql_profile_enabled: bool = os.getenv("SQL_PROFILE", "false").lower() in ("1", "true", "yes")
+    sql_slow_query_ms: float = float(os.getenv("SQL_SLOW_QUERY_MS", "100"))
+    sql_repeat_threshold: int = int(os.getenv("SQL_REPEAT_THRESHOLD", "5"))
+    profiler_enabled: bool = os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+    profiler_max_seconds: float = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+    profiler_driver_ids: tuple[int, ...] = tuple(
+        int(value) for value in os.getenv("PROFILER_DRIVER_IDS", "").split(",") if value.strip()
+    )
+    position_flush_interval_seconds: float = float(os.getenv("POSITION_FLUSH_INTERVAL_SECONDS", "2"))
 
 
 settings = Settings()
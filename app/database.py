@@ -1,6 +1,7 @@
 from collections.abc import Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
 from app.config import settings
@@ -8,11 +9,75 @@ from app.config import settings
 
 sqlite_connect_args = {"check_same_thread": False}
 
-engine = create_engine(
-    settings.database_url,
-    connect_args=sqlite_connect_args if settings.database_url.startswith("sqlite") else {},
-)
+DATABASE_PROFILES = ("default", "wal")
+
+
+def sqlite_pragmas(profile: str) -> dict[str, str | int]:
+    """PRAGMAs applied to every new SQLite connection for ``profile``.
+
+    ``default`` keeps SQLite's rollback journal and stock settings. ``wal``
+    lets readers run alongside the single writer, so dashboard and list reads
+    no longer wait on GPS flush commits.
+    """
+    if profile not in DATABASE_PROFILES:
+        raise ValueError(f"Unknown database profile {profile!r}; expected one of {', '.join(DATABASE_PROFILES)}")
+    if profile == "default":
+        return {"journal_mode": "DELETE"}
+    return {
+        "journal_mode": "WAL",
+        "synchronous": settings.sqlite_synchronous,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+    }
+
+
+def _is_file_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and url.split("://", 1)[-1] not in ("", "/")
+
+
+def build_engine(url: str, profile: str | None = None, read_only: bool = False, **kwargs) -> Engine:
+    """Create an engine for ``url``, applying the SQLite ``profile`` on connect.
+
+    ``read_only`` engines also set ``query_only`` so a read session can never
+    take the write lock by accident.
+    """
+    if not url.startswith("sqlite"):
+        return create_engine(url, **kwargs)
+
+    pragmas = sqlite_pragmas(profile or settings.database_profile)
+    if read_only:
+        pragmas = {**pragmas, "query_only": "ON"}
+    new_engine = create_engine(url, connect_args=sqlite_connect_args, **kwargs)
+
+    @event.listens_for(new_engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return new_engine
+
+
+engine = build_engine(settings.database_url)
+
+# Readers get their own pool under WAL. Without WAL a separate pool buys
+# nothing, and an in-memory database is private to each connection.
+if settings.database_profile == "wal" and _is_file_sqlite(settings.database_url):
+    read_engine = build_engine(
+        settings.database_url,
+        read_only=True,
+        pool_size=settings.database_read_pool_size,
+        max_overflow=settings.database_read_pool_size,
+    )
+else:
+    read_engine = engine
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 
@@ -22,3 +87,12 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """Session for endpoints that only read; uses the read pool under WAL."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
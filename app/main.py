@@ -1,19 +1,22 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 
 from app import models  # noqa: F401 - imported for metadata registration
 from app.config import settings
-from app.database import Base, SessionLocal, engine
+from app.database import Base, SessionLocal, engine, read_engine
 from app.routers import (
     auth,
     dashboard,
     driver,
     payroll,
+    profiling,
     route,
     run,
     school,
@@ -21,7 +24,16 @@ from app.routers import (
     student,
 )
 from app.utils.auth import get_current_driver
+from app.utils.broadcast import create_broadcast_backend
+from app.utils.db_executor import DBExecutor
+from app.utils.ingest import ingest_policy
+from app.utils.invalidation import RUN_ENDED, invalidations
+from app.utils.metrics import CONTENT_TYPE, MetricsMiddleware, instrument_engine, registry
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.passwords import password_hasher
+from app.utils.position_buffer import position_buffer
 from app.utils.seed import seed_default_driver
+from app.utils.sql_profiler import PROFILE_HEADER, SQLProfileMiddleware, sql_profiler
 from app.utils.ws_manager import ConnectionManager
 
 
@@ -30,7 +42,22 @@ async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
     with SessionLocal() as db:
         seed_default_driver(db)
+    app.state.db_executor.start()
+    password_hasher.start()
+    await app.state.ws_manager.start()
+    invalidations.attach(app.state.ws_manager.backend, asyncio.get_running_loop())
+    flusher = asyncio.create_task(
+        position_buffer.run_periodic_flush(app.state.db_executor, settings.position_flush_interval_seconds)
+    )
     yield
+    flusher.cancel()
+    with suppress(asyncio.CancelledError):
+        await flusher
+    invalidations.detach()
+    await app.state.ws_manager.stop()
+    await app.state.db_executor.run(position_buffer.flush)
+    app.state.db_executor.shutdown()
+    password_hasher.shutdown()
 
 
 app = FastAPI(title=settings.app_name, lifespan=lifespan)
@@ -42,10 +69,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, PROFILE_HEADER],
 )
+if settings.sql_profile_enabled:
+    sql_profiler.instrument(engine)
+    if read_engine is not engine:
+        sql_profiler.instrument(read_engine)
+    app.add_middleware(SQLProfileMiddleware, header=settings.debug)
+if settings.metrics_enabled:
+    # Added last so it wraps every other middleware.
+    app.add_middleware(MetricsMiddleware)
 
 app.state.templates = Jinja2Templates(directory="app/templates")
-app.state.ws_manager = ConnectionManager()
+app.state.ws_manager = ConnectionManager(backend=create_broadcast_backend())
+# latest/_frames are written by deliveries on the loop; forget must run there too.
+invalidations.register(RUN_ENDED, app.state.ws_manager.forget, on_loop=True)
+invalidations.register(RUN_ENDED, ingest_policy.forget)
+invalidations.register(RUN_ENDED, position_buffer.forget)
+app.state.db_executor = DBExecutor()
 
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -61,8 +102,35 @@ app.include_router(stop.router, dependencies=protected)
 app.include_router(run.router)
 app.include_router(run.ws_router)
 app.include_router(payroll.router, dependencies=protected)
+app.include_router(profiling.router)
 
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+if settings.metrics_enabled:
+    instrument_engine(engine, "write")
+    if read_engine is not engine:
+        instrument_engine(read_engine, "read")
+
+    registry.collected(
+        "sbt_ws_connections",
+        "Websocket subscribers per run (drivers and per-run watchers).",
+        lambda: [({"run_id": str(run_id)}, len(subscribers)) for run_id, subscribers in app.state.ws_manager.connections.items()],
+    )
+    registry.collected(
+        "sbt_ws_watchers",
+        "Open all-runs watcher websockets.",
+        lambda: [({}, len(app.state.ws_manager.watchers))],
+    )
+    registry.collected(
+        "sbt_db_executor_pending",
+        "GPS database work items queued or running.",
+        lambda: [({}, app.state.db_executor.pending)],
+    )
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -3,6 +3,7 @@ from app.models.driver import Driver
 from app.models.payroll import Payroll
 from app.models.route import Route
 from app.models.run import Run
+from app.models.run_position import RunPosition
 from app.models.school import School
 from app.models.stop import Stop
 from app.models.student import Student
@@ -14,6 +15,7 @@ __all__ = [
     "Route",
     "Stop",
     "Run",
+    "RunPosition",
     "Payroll",
     "route_school_association",
 ]
@@ -1,6 +1,6 @@
 ﻿from datetime import date
 
-from sqlalchemy import Date, Float, ForeignKey, String
+from sqlalchemy import Date, Float, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -8,6 +8,11 @@ from app.database import Base
 
 class Payroll(Base):
     __tablename__ = "payrolls"
+    __table_args__ = (
+        Index("ix_payrolls_pay_date_id", "pay_date", "id"),
+        Index("ix_payrolls_driver_id_pay_date_id", "driver_id", "pay_date", "id"),
+        Index("ix_payrolls_status_pay_date_id", "status", "pay_date", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     driver_id: Mapped[int] = mapped_column(ForeignKey("drivers.id"), nullable=False, index=True)
@@ -1,6 +1,6 @@
 ﻿from datetime import datetime
 
-from sqlalchemy import DateTime, Float, ForeignKey, String
+from sqlalchemy import DateTime, Float, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -8,6 +8,10 @@ from app.database import Base
 
 class Run(Base):
     __tablename__ = "runs"
+    __table_args__ = (
+        Index("ix_runs_driver_id_status", "driver_id", "status"),
+        Index("ix_runs_started_at", "started_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     route_id: Mapped[int] = mapped_column(ForeignKey("routes.id"), nullable=False, index=True)
@@ -23,3 +27,12 @@ class Run(Base):
     driver = relationship("Driver", back_populates="runs")
     stops = relationship("Stop", back_populates="run", cascade="all, delete-orphan", order_by="Stop.sequence")
     payroll = relationship("Payroll", back_populates="run", uselist=False)
+    # Run and route deletes remove breadcrumbs with one bulk DELETE rather
+    # than loading the whole history to delete it row by row.
+    positions = relationship(
+        "RunPosition",
+        back_populates="run",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="RunPosition.recorded_at",
+    )
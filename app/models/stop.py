@@ -1,4 +1,4 @@
-﻿from sqlalchemy import Float, ForeignKey, Integer, String
+﻿from sqlalchemy import Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -6,6 +6,7 @@ from app.database import Base
 
 class Stop(Base):
     __tablename__ = "stops"
+    __table_args__ = (Index("ix_stops_run_id_sequence", "run_id", "sequence"),)
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     run_id: Mapped[int] = mapped_column(ForeignKey("runs.id", ondelete="CASCADE"), nullable=False, index=True)
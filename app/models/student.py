@@ -1,4 +1,4 @@
-﻿from sqlalchemy import Float, ForeignKey, String
+﻿from sqlalchemy import Float, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -6,6 +6,10 @@ from app.database import Base
 
 class Student(Base):
     __tablename__ = "students"
+    __table_args__ = (
+        Index("ix_students_route_id_school_id", "route_id", "school_id"),
+        Index("ix_students_last_name_first_name_school_id", "last_name", "first_name", "school_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     first_name: Mapped[str] = mapped_column(String(80), nullable=False)
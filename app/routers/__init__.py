@@ -1,3 +1,3 @@
-﻿from app.routers import auth, dashboard, driver, payroll, route, run, school, stop, student
+﻿from app.routers import auth, dashboard, driver, payroll, profiling, route, run, school, stop, student
 
-__all__ = ["auth", "dashboard", "driver", "school", "student", "route", "stop", "run", "payroll"]
+__all__ = ["auth", "dashboard", "driver", "school", "student", "route", "stop", "run", "payroll", "profiling"]
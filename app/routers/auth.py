@@ -1,10 +1,14 @@
-﻿from fastapi import APIRouter, Depends, Form, Request
+﻿from contextlib import suppress
+
+from fastapi import APIRouter, Depends, Form, Request, status
 from fastapi.responses import JSONResponse, RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from starlette.concurrency import run_in_threadpool
 
-from app.database import get_db
+from app.database import SessionLocal
 from app.models import Driver
-from app.utils.auth import SESSION_DRIVER_KEY, get_current_driver, verify_password
+from app.utils.auth import SESSION_DRIVER_KEY, CurrentDriver, driver_auth_cache, get_current_driver
+from app.utils.passwords import PasswordHasherBusy, password_hasher
 
 
 router = APIRouter(tags=["auth"])
@@ -15,17 +19,47 @@ def login_page(request: Request):
     return request.app.state.templates.TemplateResponse("login.html", {"request": request, "error": None})
 
 
+def _find_login(email: str) -> tuple[int, str] | None:
+    with SessionLocal() as db:
+        row = db.execute(select(Driver.id, Driver.password_hash).where(Driver.email == email)).first()
+        return tuple(row) if row else None
+
+
+def _store_password_hash(driver_id: int, password_hash: str) -> None:
+    with SessionLocal() as db:
+        db.execute(update(Driver).where(Driver.id == driver_id).values(password_hash=password_hash))
+        db.commit()
+
+
+def _login_error(request: Request, error: str, status_code: int, headers: dict | None = None):
+    return request.app.state.templates.TemplateResponse(
+        "login.html",
+        {"request": request, "error": error},
+        status_code=status_code,
+        headers=headers,
+    )
+
+
 @router.post("/login")
-def login(request: Request, email: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
-    driver = db.query(Driver).filter(Driver.email == email).first()
-    if not driver or not verify_password(password, driver.password_hash):
-        return request.app.state.templates.TemplateResponse(
-            "login.html",
-            {"request": request, "error": "Invalid credentials"},
-            status_code=400,
+async def login(request: Request, email: str = Form(...), password: str = Form(...)):
+    # Hashing runs on the password process pool; only the short lookups use
+    # the shared threadpool.
+    found = await run_in_threadpool(_find_login, email)
+    try:
+        matches, rehash = await password_hasher.verify(password, found[1]) if found else (False, False)
+    except PasswordHasherBusy:
+        return _login_error(
+            request, "Too many sign-ins right now, please retry", status.HTTP_503_SERVICE_UNAVAILABLE, {"Retry-After": "2"}
         )
+    if not matches:
+        return _login_error(request, "Invalid credentials", status.HTTP_400_BAD_REQUEST)
+
+    if rehash:
+        # Upgrade to the configured work factor; a busy pool just defers it to the next login.
+        with suppress(PasswordHasherBusy):
+            await run_in_threadpool(_store_password_hash, found[0], await password_hasher.hash(password))
 
-    request.session[SESSION_DRIVER_KEY] = driver.id
+    request.session[SESSION_DRIVER_KEY] = found[0]
     return RedirectResponse(url="/", status_code=303)
 
 
@@ -36,5 +70,19 @@ def logout(request: Request):
 
 
 @router.get("/auth/me")
-def me(driver: Driver = Depends(get_current_driver)):
+def me(driver: CurrentDriver = Depends(get_current_driver)):
     return JSONResponse({"id": driver.id, "name": driver.name, "email": driver.email})
+
+
+@router.get("/auth/stats")
+def auth_stats(_: CurrentDriver = Depends(get_current_driver)):
+    return {
+        "driver_cache": driver_auth_cache.stats(),
+        "password_pool": {
+            "workers": password_hasher.workers,
+            "pending": password_hasher.pending,
+            "max_pending": password_hasher.max_pending,
+            "rejected": password_hasher.rejected,
+            "timed_out": password_hasher.timed_out,
+        },
+    }
@@ -1,22 +1,60 @@
-﻿from fastapi import APIRouter, Depends, HTTPException, status
+﻿from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import Driver
+from app.schemas.bulk import BulkImportResult
 from app.schemas.driver import DriverCreate, DriverRead, DriverUpdate
-from app.utils.auth import hash_password
+from app.utils.auth import driver_auth_cache
+from app.utils.bulk_import import BulkSpec, bulk_rows, import_rows
+from app.utils.dashboard_metrics import dashboard_metrics
+from app.utils.pagination import PageParams, page_params, paginate
+from app.utils.passwords import PasswordHasherBusy, password_hasher
 
 
 router = APIRouter(prefix="/drivers", tags=["drivers"])
 
 
+def _hash_passwords(passwords: list[str]) -> list[str]:
+    try:
+        return password_hasher.hash_blocking(passwords)
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Password hashing is busy, please retry",
+            headers={"Retry-After": "2"},
+        ) from None
+
+
+def _driver_values(payloads: list[DriverCreate]) -> list[dict]:
+    hashes = _hash_passwords([payload.password for payload in payloads])
+    values = []
+    for payload, password_hash in zip(payloads, hashes):
+        row = payload.model_dump(exclude={"password"})
+        row["email"] = str(payload.email)
+        row["password_hash"] = password_hash
+        values.append(row)
+    return values
+
+
+DRIVER_BULK_SPEC = BulkSpec(model=Driver, schema=DriverCreate, key=(Driver.email,), to_values=_driver_values)
+
+
 @router.get("/", response_model=list[DriverRead])
-def list_drivers(db: Session = Depends(get_db)):
-    return db.query(Driver).order_by(Driver.id).all()
+def list_drivers(
+    response: Response,
+    is_active: bool | None = None,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+):
+    query = db.query(Driver)
+    if is_active is not None:
+        query = query.filter(Driver.is_active == is_active)
+    return paginate(query, page, response, (Driver.id,))
 
 
 @router.get("/{driver_id}", response_model=DriverRead)
-def get_driver(driver_id: int, db: Session = Depends(get_db)):
+def get_driver(driver_id: int, db: Session = Depends(get_read_db)):
     driver = db.get(Driver, driver_id)
     if not driver:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Driver not found")
@@ -31,16 +69,22 @@ def create_driver(payload: DriverCreate, db: Session = Depends(get_db)):
     driver = Driver(
         name=payload.name,
         email=str(payload.email),
-        password_hash=hash_password(payload.password),
+        password_hash=_hash_passwords([payload.password])[0],
         phone=payload.phone,
         is_active=payload.is_active,
     )
     db.add(driver)
     db.commit()
+    dashboard_metrics.invalidate()
     db.refresh(driver)
     return driver
 
 
+@router.post("/bulk", response_model=BulkImportResult)
+def bulk_create_drivers(rows: list = Depends(bulk_rows), db: Session = Depends(get_db)):
+    return import_rows(db, DRIVER_BULK_SPEC, rows)
+
+
 @router.put("/{driver_id}", response_model=DriverRead)
 def update_driver(driver_id: int, payload: DriverUpdate, db: Session = Depends(get_db)):
     driver = db.get(Driver, driver_id)
@@ -59,9 +103,10 @@ def update_driver(driver_id: int, payload: DriverUpdate, db: Session = Depends(g
         setattr(driver, key, value)
 
     if password:
-        driver.password_hash = hash_password(password)
+        driver.password_hash = _hash_passwords([password])[0]
 
     db.commit()
+    driver_auth_cache.invalidate(driver_id)
     db.refresh(driver)
     return driver
 
@@ -73,3 +118,5 @@ def delete_driver(driver_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Driver not found")
     db.delete(driver)
     db.commit()
+    driver_auth_cache.invalidate(driver_id)
+    dashboard_metrics.invalidate()
@@ -1,21 +1,65 @@
-﻿from fastapi import APIRouter, Depends, HTTPException, status
+﻿from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import Payroll
 from app.schemas.payroll import PayrollCreate, PayrollRead, PayrollUpdate
+from app.utils.dashboard_metrics import dashboard_metrics
+from app.utils.export import ExportFormat, export_response
+from app.utils.pagination import PageParams, page_params, paginate
 
 
 router = APIRouter(prefix="/payrolls", tags=["payrolls"])
 
 
+def _payroll_filters(
+    driver_id: int | None, status_filter: str | None, pay_date_from: date | None, pay_date_to: date | None
+) -> list:
+    criteria = []
+    if driver_id is not None:
+        criteria.append(Payroll.driver_id == driver_id)
+    if status_filter is not None:
+        criteria.append(Payroll.status == status_filter)
+    if pay_date_from is not None:
+        criteria.append(Payroll.pay_date >= pay_date_from)
+    if pay_date_to is not None:
+        criteria.append(Payroll.pay_date <= pay_date_to)
+    return criteria
+
+
 @router.get("/", response_model=list[PayrollRead])
-def list_payrolls(db: Session = Depends(get_db)):
-    return db.query(Payroll).order_by(Payroll.pay_date.desc(), Payroll.id.desc()).all()
+def list_payrolls(
+    response: Response,
+    driver_id: int | None = None,
+    status_filter: str | None = Query(None, alias="status"),
+    pay_date_from: date | None = None,
+    pay_date_to: date | None = None,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+):
+    query = db.query(Payroll).filter(*_payroll_filters(driver_id, status_filter, pay_date_from, pay_date_to))
+    return paginate(query, page, response, (Payroll.pay_date, Payroll.id), descending=True)
+
+
+@router.get("/export")
+def export_payrolls(
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    driver_id: int | None = None,
+    status_filter: str | None = Query(None, alias="status"),
+    pay_date_from: date | None = None,
+    pay_date_to: date | None = None,
+):
+    stmt = select(*Payroll.__table__.columns).where(
+        *_payroll_filters(driver_id, status_filter, pay_date_from, pay_date_to)
+    )
+    return export_response(stmt, (Payroll.pay_date, Payroll.id), export_format, "payrolls")
 
 
 @router.get("/{payroll_id}", response_model=PayrollRead)
-def get_payroll(payroll_id: int, db: Session = Depends(get_db)):
+def get_payroll(payroll_id: int, db: Session = Depends(get_read_db)):
     payroll = db.get(Payroll, payroll_id)
     if not payroll:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payroll entry not found")
@@ -27,6 +71,7 @@ def create_payroll(payload: PayrollCreate, db: Session = Depends(get_db)):
     payroll = Payroll(**payload.model_dump())
     db.add(payroll)
     db.commit()
+    dashboard_metrics.invalidate()
     db.refresh(payroll)
     return payroll
 
@@ -41,6 +86,7 @@ def update_payroll(payroll_id: int, payload: PayrollUpdate, db: Session = Depend
         setattr(payroll, key, value)
 
     db.commit()
+    dashboard_metrics.invalidate()
     db.refresh(payroll)
     return payroll
 
@@ -53,3 +99,4 @@ def delete_payroll(payroll_id: int, db: Session = Depends(get_db)):
 
     db.delete(payroll)
     db.commit()
+    dashboard_metrics.invalidate()
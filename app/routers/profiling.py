@@ -0,0 +1,47 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+from app.utils.auth import CurrentDriver, get_current_driver
+from app.utils.sampling_profiler import ProfilerBusy, sampling_profiler
+
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+def require_profiler_access(driver: CurrentDriver = Depends(get_current_driver)) -> CurrentDriver:
+    if not settings.profiler_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    # Stacks expose internals of every request in flight, so an empty
+    # allowlist means nobody rather than every signed-in driver.
+    if driver.id not in settings.profiler_driver_ids:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Profiling not allowed for this driver")
+    return driver
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10, gt=0, le=settings.profiler_max_seconds),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    idle: bool = Query(False, description="Include threads parked waiting for work"),
+    _: CurrentDriver = Depends(require_profiler_access),
+):
+    """Sample every thread's stack for ``seconds`` and return collapsed stacks.
+
+    The output feeds ``flamegraph.pl`` or speedscope directly. Only one
+    profile runs at a time per worker.
+    """
+    try:
+        result = await asyncio.to_thread(sampling_profiler.run, seconds, interval_ms / 1000, idle)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    return PlainTextResponse(
+        result.collapsed(),
+        headers={
+            "X-Profile-Samples": str(result.samples),
+            "X-Profile-Seconds": f"{result.seconds:.3f}",
+            "X-Profile-Interval-Ms": f"{result.interval * 1000:g}",
+        },
+    )
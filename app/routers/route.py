@@ -1,25 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session, joinedload
+import json
+from dataclasses import dataclass
 
-from app.database import get_db
-from app.models import Route, Run, School, Stop
-from app.schemas.route import RouteCreate, RouteOut, RouteUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.database import get_db, get_read_db
+from app.models import Route, Run, RunPosition, School, Stop
+from app.schemas.route import RouteBase, RouteCreate, RouteOut, RouteUpdate, RunNestedOut
+from app.utils.dashboard_metrics import dashboard_metrics
+from app.utils.invalidation import RUN_ENDED, invalidations
+from app.utils.pagination import NEXT_CURSOR_HEADER, PageParams, page_params, paginate
+from app.utils.position_buffer import position_buffer
+from app.utils.route_cache import CachedRoute, RunPositions, combined_etag, if_none_match, route_cache
+from app.utils.run_geometry import run_geometry_cache
 
 
 router = APIRouter(prefix="/routes", tags=["routes"])
 
+ROUTE_INCLUDES = ("schools", "runs", "stops")
+# Output field each expansion fills in.
+_INCLUDE_FIELDS = {"schools": "school_ids", "runs": "runs", "stops": "runs"}
+POSITION_FIELDS = ("last_latitude", "last_longitude", "last_updated")
+
+
+@dataclass(frozen=True)
+class RouteExpansion:
+    include: frozenset[str]
+    fields: tuple[str, ...] | None = None
+
+    @property
+    def full(self) -> bool:
+        return self.include == frozenset(ROUTE_INCLUDES) and self.fields is None
+
+
+FULL_EXPANSION = RouteExpansion(include=frozenset(ROUTE_INCLUDES))
+
+
+def _split(value: str) -> list[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def route_expansion(
+    include: str | None = Query(
+        None, description="Comma-separated subset of schools,runs,stops to load; empty for route headers only"
+    ),
+    fields: str | None = Query(None, description="Comma-separated top-level route fields to return"),
+) -> RouteExpansion:
+    selected = None
+    if fields is not None:
+        selected = tuple(_split(fields))
+        unknown = [name for name in selected if name not in RouteOut.model_fields]
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    if include is None:
+        # Without an explicit include, load only what the selected fields need.
+        names = {name for name in ROUTE_INCLUDES if selected is None or _INCLUDE_FIELDS[name] in selected}
+    else:
+        names = set(_split(include))
+        unknown = sorted(names - set(ROUTE_INCLUDES))
+        if unknown:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown include: {', '.join(unknown)}")
+        if "stops" in names:
+            names.add("runs")
+    return RouteExpansion(include=frozenset(names), fields=selected)
+
+
+def _route_options(include: frozenset[str]) -> list:
+    # selectinload issues one IN query per relationship instead of joining
+    # schools x runs x stops into a single cartesian result.
+    options = []
+    if "schools" in include:
+        options.append(selectinload(Route.schools))
+    if "stops" in include:
+        options.append(selectinload(Route.runs).selectinload(Run.stops))
+    elif "runs" in include:
+        options.append(selectinload(Route.runs))
+    return options
+
 
 def _load_route_with_nested(route_id: int, db: Session) -> Route | None:
-    stmt = (
-        select(Route)
-        .where(Route.id == route_id)
-        .options(
-            joinedload(Route.schools),
-            joinedload(Route.runs).joinedload(Run.stops),
-        )
-    )
-    return db.execute(stmt).scalars().unique().first()
+    stmt = select(Route).where(Route.id == route_id).options(*_route_options(FULL_EXPANSION.include))
+    return db.execute(stmt).scalars().first()
 
 
 def _to_route_out(route: Route) -> RouteOut:
@@ -38,19 +103,145 @@ def _to_route_out(route: Route) -> RouteOut:
     )
 
 
+def _to_route_payload(route: Route, expansion: RouteExpansion) -> dict:
+    """Partial ``RouteOut`` for a non-default expansion, as JSON-ready data."""
+    data = {name: getattr(route, name) for name in RouteBase.model_fields}
+    data["id"] = route.id
+    data["created_at"] = route.created_at
+    if "schools" in expansion.include:
+        data["school_ids"] = [school.id for school in route.schools]
+    if "runs" in expansion.include:
+        runs = sorted(route.runs, key=lambda r: r.id)
+        if "stops" in expansion.include:
+            data["runs"] = [_with_buffered_fix(RunNestedOut.model_validate(run).model_dump()) for run in runs]
+        else:
+            data["runs"] = [
+                _with_buffered_fix({name: getattr(run, name) for name in RunNestedOut.model_fields if name != "stops"})
+                for run in runs
+            ]
+    if expansion.fields is not None:
+        data = {name: data[name] for name in expansion.fields if name in data}
+    return jsonable_encoder(data)
+
+
+def _with_buffered_fix(run: dict) -> dict:
+    fix = position_buffer.get(run["id"])
+    if fix is not None:
+        run.update(zip(POSITION_FIELDS, (fix.latitude, fix.longitude, fix.updated_at)))
+    return run
+
+
+def _cached_routes(route_ids: list[int], db: Session) -> list[CachedRoute]:
+    """Serialized routes in ``route_ids`` order, loading cache misses in one pass."""
+    entries = {route_id: route_cache.get(route_id) for route_id in route_ids}
+    missing = [route_id for route_id, entry in entries.items() if entry is None]
+    if missing:
+        stamps = {route_id: route_cache.stamp(route_id) for route_id in missing}
+        # Under WAL the load must not reuse a read snapshot older than the stamps.
+        db.rollback()
+        stmt = select(Route).where(Route.id.in_(missing)).options(*_route_options(FULL_EXPANSION.include))
+        for route in db.execute(stmt).scalars():
+            body = _to_route_out(route).model_dump_json().encode("utf-8")
+            positions = {run.id: (run.last_latitude, run.last_longitude, run.last_updated) for run in route.runs}
+            entries[route.id] = route_cache.put(route.id, stamps[route.id], body, positions)
+    return [entry for entry in (entries[route_id] for route_id in route_ids) if entry is not None]
+
+
+def _live_positions(route_ids: list[int], db: Session) -> dict[int, RunPositions]:
+    """Current position of every run on ``route_ids``: flushed, then buffered."""
+    stmt = select(Run.route_id, Run.id, Run.last_latitude, Run.last_longitude, Run.last_updated).where(
+        Run.route_id.in_(route_ids)
+    )
+    positions: dict[int, RunPositions] = {route_id: {} for route_id in route_ids}
+    for route_id, run_id, *position in db.execute(stmt):
+        fix = position_buffer.get(run_id)
+        positions[route_id][run_id] = (fix.latitude, fix.longitude, fix.updated_at) if fix else tuple(position)
+    return positions
+
+
+def _live_etag(entry: CachedRoute, positions: RunPositions) -> str | None:
+    if entry.etag is None or positions == entry.positions:
+        return entry.etag
+    return combined_etag([entry.etag], repr(sorted(positions.items())))
+
+
+def _live_body(entry: CachedRoute, positions: RunPositions) -> bytes:
+    """``entry.body`` with the runs' current positions in place of the cached ones."""
+    if positions == entry.positions:
+        return entry.body
+    data = json.loads(entry.body)
+    for run in data["runs"]:
+        if run["id"] in positions:
+            run.update(zip(POSITION_FIELDS, jsonable_encoder(positions[run["id"]])))
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_response(body: bytes, etag: str | None, headers: dict[str, str] | None = None) -> Response:
+    headers = dict(headers or {})
+    if etag:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "no-cache"
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/", response_model=list[RouteOut])
-def list_routes(db: Session = Depends(get_db)):
-    stmt = select(Route).options(joinedload(Route.schools), joinedload(Route.runs).joinedload(Run.stops))
-    routes = db.execute(stmt).scalars().unique().all()
-    return [_to_route_out(route) for route in routes]
+def list_routes(
+    request: Request,
+    response: Response,
+    driver_id: int | None = None,
+    expansion: RouteExpansion = Depends(route_expansion),
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+):
+    criteria = [Route.driver_id == driver_id] if driver_id is not None else []
+    if expansion.full:
+        query = db.query(Route.id).filter(*criteria)
+    else:
+        query = db.query(Route).filter(*criteria).options(*_route_options(expansion.include))
+    rows = paginate(query, page, response, (Route.id,))
+    headers = {NEXT_CURSOR_HEADER: response.headers[NEXT_CURSOR_HEADER]} if NEXT_CURSOR_HEADER in response.headers else {}
+    if not expansion.full:
+        return JSONResponse([_to_route_payload(route, expansion) for route in rows], headers=headers)
+
+    route_ids = [row.id for row in rows]
+
+    entries = _cached_routes(route_ids, db)
+    positions = _live_positions(route_ids, db)
+    etags = [_live_etag(entry, positions[entry.route_id]) for entry in entries]
+    etag = None
+    if all(etags):
+        etag = combined_etag(etags, headers.get(NEXT_CURSOR_HEADER, ""))
+        if if_none_match(request, etag):
+            route_cache.not_modified += 1
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **headers})
+    body = b",".join(_live_body(entry, positions[entry.route_id]) for entry in entries)
+    return _json_response(b"[" + body + b"]", etag, headers)
 
 
 @router.get("/{route_id}", response_model=RouteOut)
-def get_route(route_id: int, db: Session = Depends(get_db)):
-    route = _load_route_with_nested(route_id, db)
-    if not route:
+def get_route(
+    route_id: int,
+    request: Request,
+    expansion: RouteExpansion = Depends(route_expansion),
+    db: Session = Depends(get_read_db),
+):
+    if not expansion.full:
+        stmt = select(Route).where(Route.id == route_id).options(*_route_options(expansion.include))
+        route = db.execute(stmt).scalars().first()
+        if not route:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Route not found")
+        return JSONResponse(_to_route_payload(route, expansion))
+
+    entry = route_cache.get(route_id)
+    entries = [entry] if entry is not None else _cached_routes([route_id], db)
+    if not entries:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Route not found")
-    return _to_route_out(route)
+    positions = _live_positions([route_id], db)[route_id]
+    etag = _live_etag(entries[0], positions)
+    if etag and if_none_match(request, etag):
+        route_cache.not_modified += 1
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return _json_response(_live_body(entries[0], positions), etag)
 
 
 @router.post("/", response_model=RouteOut, status_code=status.HTTP_201_CREATED)
@@ -79,6 +270,8 @@ def create_route(payload: RouteCreate, db: Session = Depends(get_db)):
                 db.add(stop)
 
         db.commit()
+        dashboard_metrics.invalidate()
+        route_cache.bump(route.id)
     except Exception as exc:
         db.rollback()
         raise HTTPException(
@@ -107,6 +300,8 @@ def update_route(route_id: int, payload: RouteUpdate, db: Session = Depends(get_
         route.schools = schools
 
     db.commit()
+    dashboard_metrics.invalidate()
+    route_cache.bump(route_id)
     route = _load_route_with_nested(route_id, db)
     return _to_route_out(route)
 
@@ -117,5 +312,13 @@ def delete_route(route_id: int, db: Session = Depends(get_db)):
     if not route:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Route not found")
 
+    run_ids = [run.id for run in route.runs]
+    if run_ids:
+        db.execute(delete(RunPosition).where(RunPosition.run_id.in_(run_ids)))
     db.delete(route)
     db.commit()
+    dashboard_metrics.invalidate()
+    route_cache.bump(route_id)
+    run_geometry_cache.invalidate(*run_ids)
+    position_buffer.discard(*run_ids)
+    invalidations.publish(RUN_ENDED, *run_ids)
@@ -1,17 +1,19 @@
 ﻿
-from datetime import datetime
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
 from fastapi.responses import RedirectResponse
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal, get_db
-from app.models import Driver, Run
-from app.schemas.run import RunCreate, RunRead, RunUpdate
-from app.utils.auth import SESSION_DRIVER_KEY, get_current_driver, get_current_driver_optional
+from app.database import get_db, get_read_db
+from app.models import Run, RunPosition
+from app.schemas.run import RunCreate, RunPositionRead, RunRead, RunUpdate
+from app.utils.auth import SESSION_DRIVER_KEY, CurrentDriver, get_current_driver, get_current_driver_optional
+from app.utils.dashboard_metrics import dashboard_metrics
+from app.utils.db_executor import DBExecutor
+from app.utils.export import ExportFormat, export_response
 from app.utils.gps import (
-    calculate_route_progress,
-    compute_nearest_stop,
     estimate_eta_minutes,
     get_ordered_run_stops,
     haversine_meters,
@@ -19,60 +21,147 @@ from app.utils.gps import (
     utc_now,
     validate_gps,
 )
+from app.utils.ingest import ingest_policy
+from app.utils.invalidation import RUN_ENDED, invalidations
+from app.utils.metrics import gps_fixes
+from app.utils.pagination import PageParams, page_params, paginate
+from app.utils.position_buffer import position_buffer
+from app.utils.route_cache import route_cache
+from app.utils.run_geometry import RunGeometry, load_run_geometry, run_geometry_cache
+from app.utils.sql_profiler import sql_profiler
+from app.utils.wire import PROTOCOLS as WIRE_PROTOCOLS
 
 
 router = APIRouter(prefix="/runs", tags=["runs"])
 ws_router = APIRouter(tags=["runs"])
 
 
+def _as_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _to_run_read(run: Run) -> RunRead:
+    run_read = RunRead.model_validate(run)
+    fix = position_buffer.get(run.id)
+    if fix is None:
+        return run_read
+    return run_read.model_copy(
+        update={"last_latitude": fix.latitude, "last_longitude": fix.longitude, "last_updated": fix.updated_at}
+    )
+
+
+def _run_filters(
+    status_filter: str | None,
+    driver_id: int | None,
+    route_id: int | None,
+    started_from: datetime | None,
+    started_to: datetime | None,
+) -> list:
+    criteria = []
+    if status_filter is not None:
+        criteria.append(Run.status == status_filter)
+    if driver_id is not None:
+        criteria.append(Run.driver_id == driver_id)
+    if route_id is not None:
+        criteria.append(Run.route_id == route_id)
+    if started_from is not None:
+        criteria.append(Run.started_at >= _as_naive_utc(started_from))
+    if started_to is not None:
+        criteria.append(Run.started_at <= _as_naive_utc(started_to))
+    return criteria
+
+
 @router.get("/", response_model=list[RunRead])
-def list_runs(db: Session = Depends(get_db), _: Driver = Depends(get_current_driver)):
-    return db.query(Run).order_by(Run.id.desc()).all()
+def list_runs(
+    response: Response,
+    status_filter: str | None = Query(None, alias="status"),
+    driver_id: int | None = None,
+    route_id: int | None = None,
+    started_from: datetime | None = None,
+    started_to: datetime | None = None,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+    _: CurrentDriver = Depends(get_current_driver),
+):
+    query = db.query(Run).filter(*_run_filters(status_filter, driver_id, route_id, started_from, started_to))
+    runs = paginate(query, page, response, (Run.id,), descending=True)
+    return [_to_run_read(run) for run in runs]
+
+
+@router.get("/export")
+def export_runs(
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    status_filter: str | None = Query(None, alias="status"),
+    driver_id: int | None = None,
+    route_id: int | None = None,
+    started_from: datetime | None = None,
+    started_to: datetime | None = None,
+    _: CurrentDriver = Depends(get_current_driver),
+):
+    stmt = select(*Run.__table__.columns).where(
+        *_run_filters(status_filter, driver_id, route_id, started_from, started_to)
+    )
+    return export_response(stmt, (Run.id,), export_format, "runs")
 
 
 @router.get("/{run_id}", response_model=RunRead)
-def get_run(run_id: int, db: Session = Depends(get_db), _: Driver = Depends(get_current_driver)):
+def get_run(run_id: int, db: Session = Depends(get_read_db), _: CurrentDriver = Depends(get_current_driver)):
     run = db.get(Run, run_id)
     if not run:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
-    return run
+    return _to_run_read(run)
 
 
 @router.post("/", response_model=RunRead, status_code=status.HTTP_201_CREATED)
-def create_run(payload: RunCreate, db: Session = Depends(get_db), _: Driver = Depends(get_current_driver)):
+def create_run(payload: RunCreate, db: Session = Depends(get_db), _: CurrentDriver = Depends(get_current_driver)):
     run = Run(**payload.model_dump())
     db.add(run)
     db.commit()
+    dashboard_metrics.invalidate()
+    route_cache.bump(run.route_id)
     db.refresh(run)
     return run
 
 
 @router.put("/{run_id}", response_model=RunRead)
-def update_run(run_id: int, payload: RunUpdate, db: Session = Depends(get_db), _: Driver = Depends(get_current_driver)):
+def update_run(run_id: int, payload: RunUpdate, db: Session = Depends(get_db), _: CurrentDriver = Depends(get_current_driver)):
     run = db.get(Run, run_id)
     if not run:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
 
+    previous_route_id = run.route_id
     for key, value in payload.model_dump(exclude_unset=True).items():
         setattr(run, key, value)
 
     db.commit()
+    dashboard_metrics.invalidate()
+    route_cache.bump(previous_route_id, run.route_id)
+    run_geometry_cache.invalidate(run_id)
     db.refresh(run)
-    return run
+    return _to_run_read(run)
 
 
 @router.delete("/{run_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_run(run_id: int, db: Session = Depends(get_db), _: Driver = Depends(get_current_driver)):
+def delete_run(run_id: int, db: Session = Depends(get_db), _: CurrentDriver = Depends(get_current_driver)):
     run = db.get(Run, run_id)
     if not run:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
 
+    route_id = run.route_id
+    db.execute(delete(RunPosition).where(RunPosition.run_id == run_id))
     db.delete(run)
     db.commit()
+    dashboard_metrics.invalidate()
+    route_cache.bump(route_id)
+    run_geometry_cache.invalidate(run_id)
+    position_buffer.discard(run_id)
+    invalidations.publish(RUN_ENDED, run_id)
 
 
 @router.post("/{run_id}/start", response_model=RunRead)
-def start_run(run_id: int, db: Session = Depends(get_db), driver: Driver = Depends(get_current_driver)):
+def start_run(run_id: int, db: Session = Depends(get_db), driver: CurrentDriver = Depends(get_current_driver)):
     run = db.get(Run, run_id)
     if not run:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
@@ -84,12 +173,17 @@ def start_run(run_id: int, db: Session = Depends(get_db), driver: Driver = Depen
         run.started_at = datetime.utcnow()
     run.ended_at = None
     db.commit()
+    dashboard_metrics.invalidate()
     db.refresh(run)
-    return run
+    route_cache.bump(run.route_id)
+    run_geometry_cache.invalidate(run_id)
+    run_geometry_cache.put(RunGeometry.from_run(run))
+    ingest_policy.forget(run_id)
+    return _to_run_read(run)
 
 
 @router.post("/{run_id}/finish", response_model=RunRead)
-def finish_run(run_id: int, db: Session = Depends(get_db), driver: Driver = Depends(get_current_driver)):
+def finish_run(run_id: int, db: Session = Depends(get_db), driver: CurrentDriver = Depends(get_current_driver)):
     run = db.get(Run, run_id)
     if not run:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
@@ -99,16 +193,56 @@ def finish_run(run_id: int, db: Session = Depends(get_db), driver: Driver = Depe
     run.status = "completed"
     run.ended_at = datetime.utcnow()
     db.commit()
+    dashboard_metrics.invalidate()
+    run_geometry_cache.invalidate(run_id)
+    invalidations.publish(RUN_ENDED, run_id)
     db.refresh(run)
-    return run
+    route_cache.bump(run.route_id)
+    return _to_run_read(run)
+
+
+@router.get("/{run_id}/track", response_model=list[RunPositionRead])
+def get_run_track(
+    run_id: int,
+    start: datetime | None = Query(None, alias="from"),
+    end: datetime | None = Query(None, alias="to"),
+    limit: int = Query(5000, ge=1, le=50000),
+    db: Session = Depends(get_read_db),
+    _: CurrentDriver = Depends(get_current_driver),
+):
+    stmt = select(RunPosition).where(RunPosition.run_id == run_id)
+    if start is not None:
+        stmt = stmt.where(RunPosition.recorded_at >= _as_naive_utc(start))
+    if end is not None:
+        stmt = stmt.where(RunPosition.recorded_at <= _as_naive_utc(end))
+    return db.execute(stmt.order_by(RunPosition.recorded_at).limit(limit)).scalars().all()
+
+
+@router.get("/{run_id}/position", response_model=RunPositionRead)
+def get_run_position_at(
+    run_id: int,
+    at: datetime = Query(...),
+    db: Session = Depends(get_read_db),
+    _: CurrentDriver = Depends(get_current_driver),
+):
+    stmt = (
+        select(RunPosition)
+        .where(RunPosition.run_id == run_id, RunPosition.recorded_at <= _as_naive_utc(at))
+        .order_by(RunPosition.recorded_at.desc())
+        .limit(1)
+    )
+    position = db.execute(stmt).scalars().first()
+    if not position:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No position recorded before that time")
+    return position
 
 
 @router.get("/{run_id}/driver")
 def driver_run_page(
     run_id: int,
     request: Request,
-    db: Session = Depends(get_db),
-    current_driver: Driver | None = Depends(get_current_driver_optional),
+    db: Session = Depends(get_read_db),
+    current_driver: CurrentDriver | None = Depends(get_current_driver_optional),
 ):
     if not current_driver:
         return RedirectResponse(url="/login", status_code=303)
@@ -134,20 +268,120 @@ def driver_run_page(
     )
 
 
+def _build_gps_update(geometry: RunGeometry, lat: float, lon: float, speed_kmh: float | None) -> dict:
+    """Live update for one fix; ``current_stop`` is the last stop passed, not the nearest one."""
+    total = len(geometry)
+    cursor = run_geometry_cache.cursor(geometry.run_id)
+    cursor.advance(lat, lon, geometry.latitudes, geometry.longitudes, geometry.cumulative_m)
+    current_index = cursor.current_index(total, geometry.cumulative_m)
+    next_index = current_index + 1 if current_index >= 0 and current_index < total - 1 else -1
+    next_name = geometry.names[next_index] if next_index >= 0 else None
+    dist_to_next = (
+        haversine_meters(lat, lon, float(geometry.latitudes[next_index]), float(geometry.longitudes[next_index]))
+        if next_index >= 0
+        else 0
+    )
+
+    progress = cursor.progress_percent(total, geometry.cumulative_m)
+    eta_minutes = estimate_eta_minutes(dist_to_next, speed_kmh)
+    alert = trigger_approaching_alert(dist_to_next, next_name)
+
+    return {
+        "run_id": geometry.run_id,
+        "timestamp": utc_now().isoformat(),
+        "latitude": lat,
+        "longitude": lon,
+        "current_stop": geometry.names[current_index] if current_index >= 0 else None,
+        "next_stop": next_name,
+        "current_stop_index": current_index if current_index >= 0 else None,
+        "next_stop_index": next_index if next_index >= 0 else None,
+        "progress_percent": round(progress, 2),
+        "eta_minutes": eta_minutes,
+        "distance_to_next_m": round(dist_to_next, 2),
+        "alert": alert,
+    }
+
+
+async def _get_run_geometry(db_executor: DBExecutor, run_id: int) -> RunGeometry | None:
+    geometry = run_geometry_cache.get(run_id)
+    if geometry is None:
+        geometry = await db_executor.run(load_run_geometry, run_id)
+    return geometry
+
+
+async def _ingest_gps_fix(
+    db_executor: DBExecutor, run_id: int, lat: float, lon: float, speed_kmh: float | None
+) -> dict | None:
+    geometry = await _get_run_geometry(db_executor, run_id)
+    if geometry is None:
+        gps_fixes.inc("rejected")
+        return {"error": "Run not found"}
+    if geometry.status != "active":
+        gps_fixes.inc("rejected")
+        return {"error": "Run is not active"}
+    if not ingest_policy.accept(run_id, lat, lon):
+        gps_fixes.inc("suppressed")
+        position_buffer.see(run_id, lat, lon, speed_kmh)
+        return None
+
+    gps_fixes.inc("accepted")
+    position_buffer.record(run_id, lat, lon, speed_kmh)
+    return _build_gps_update(geometry, lat, lon, speed_kmh)
+
+
+@ws_router.get("/ws/stats")
+def websocket_stats(request: Request, _: CurrentDriver = Depends(get_current_driver)):
+    return {**request.app.state.ws_manager.stats(), "ingest": ingest_policy.stats()}
+
+
+@ws_router.websocket("/ws/watch")
+async def watch_socket(websocket: WebSocket, runs: str | None = None, protocol: str = "json"):
+    """Read-only live updates for one run, a comma-separated set, or every active run.
+
+    Served entirely from the connection manager's latest-update cache; the
+    current state of each watched run is sent on connect.
+    """
+    if not websocket.session.get(SESSION_DRIVER_KEY):
+        await websocket.close(code=4401)
+        return
+    if protocol not in WIRE_PROTOCOLS:
+        await websocket.close(code=4400)
+        return
+
+    try:
+        run_ids = [int(value) for value in runs.split(",") if value.strip()] if runs else None
+    except ValueError:
+        await websocket.close(code=4400)
+        return
+
+    manager = websocket.app.state.ws_manager
+    await manager.subscribe(websocket, run_ids, binary=protocol == "binary")
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        manager.unsubscribe(websocket)
+
+
 @ws_router.websocket("/ws/gps/{run_id}")
-async def gps_socket(websocket: WebSocket, run_id: int):
+async def gps_socket(websocket: WebSocket, run_id: int, protocol: str = "json"):
     driver_id = websocket.session.get(SESSION_DRIVER_KEY)
     if not driver_id:
         await websocket.close(code=4401)
         return
+    if protocol not in WIRE_PROTOCOLS:
+        await websocket.close(code=4400)
+        return
 
     manager = websocket.app.state.ws_manager
-    await manager.connect(run_id, websocket)
+    db_executor = websocket.app.state.db_executor
+    await manager.connect(run_id, websocket, binary=protocol == "binary")
 
-    db = SessionLocal()
     try:
-        run = db.get(Run, run_id)
-        if not run or run.driver_id != driver_id:
+        geometry = await _get_run_geometry(db_executor, run_id)
+        if not geometry or geometry.driver_id != driver_id:
             await websocket.send_json({"error": "Not authorized for this run"})
             await websocket.close(code=4403)
             manager.disconnect(run_id, websocket)
@@ -160,48 +394,20 @@ async def gps_socket(websocket: WebSocket, run_id: int):
             speed_kmh = payload.get("speed_kmh")
 
             if lat is None or lon is None or not validate_gps(lat, lon):
-                await websocket.send_json({"error": "Invalid GPS coordinates"})
+                gps_fixes.inc("rejected")
+                await manager.send(run_id, websocket, {"error": "Invalid GPS coordinates"})
                 continue
 
-            run = db.get(Run, run_id)
-            if not run:
-                await websocket.send_json({"error": "Run not found"})
+            with sql_profiler.profile(f"WS /ws/gps/{run_id}"):
+                message = await _ingest_gps_fix(db_executor, run_id, lat, lon, speed_kmh)
+            if message is None:
                 continue
-            if run.status != "active":
-                await websocket.send_json({"error": "Run is not active"})
+            if "error" in message:
+                await manager.send(run_id, websocket, message)
                 continue
 
-            stops = get_ordered_run_stops(run)
-
-            nearest_stop, dist_to_current, current_index = compute_nearest_stop(lat, lon, stops)
-            next_stop = stops[current_index + 1] if current_index >= 0 and current_index < len(stops) - 1 else None
-            dist_to_next = haversine_meters(lat, lon, next_stop.latitude, next_stop.longitude) if next_stop else 0
-
-            progress = calculate_route_progress(max(current_index, 0), len(stops), dist_to_current)
-            eta_minutes = estimate_eta_minutes(dist_to_next, speed_kmh)
-            alert = trigger_approaching_alert(dist_to_next, next_stop.name if next_stop else None)
-
-            run.last_latitude = lat
-            run.last_longitude = lon
-            run.last_updated = datetime.utcnow()
-            db.commit()
-
-            update = {
-                "run_id": run_id,
-                "timestamp": utc_now().isoformat(),
-                "latitude": lat,
-                "longitude": lon,
-                "current_stop": nearest_stop.name if nearest_stop else None,
-                "next_stop": next_stop.name if next_stop else None,
-                "progress_percent": round(progress, 2),
-                "eta_minutes": eta_minutes,
-                "distance_to_next_m": round(dist_to_next, 2),
-                "alert": alert,
-            }
-
-            await manager.broadcast(run_id, update)
+            await manager.broadcast(run_id, message)
     except WebSocketDisconnect:
         manager.disconnect(run_id, websocket)
     finally:
         manager.disconnect(run_id, websocket)
-        db.close()
@@ -1,21 +1,24 @@
-﻿from fastapi import APIRouter, Depends, HTTPException, status
+﻿from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 from app.models import School
 from app.schemas.school import SchoolCreate, SchoolRead, SchoolUpdate
+from app.utils.dashboard_metrics import dashboard_metrics
+from app.utils.pagination import PageParams, page_params, paginate
+from app.utils.route_cache import route_cache
 
 
 router = APIRouter(prefix="/schools", tags=["schools"])
 
 
 @router.get("/", response_model=list[SchoolRead])
-def list_schools(db: Session = Depends(get_db)):
-    return db.query(School).order_by(School.id).all()
+def list_schools(response: Response, page: PageParams = Depends(page_params), db: Session = Depends(get_read_db)):
+    return paginate(db.query(School), page, response, (School.id,))
 
 
 @router.get("/{school_id}", response_model=SchoolRead)
-def get_school(school_id: int, db: Session = Depends(get_db)):
+def get_school(school_id: int, db: Session = Depends(get_read_db)):
     school = db.get(School, school_id)
     if not school:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="School not found")
@@ -27,6 +30,7 @@ def create_school(payload: SchoolCreate, db: Session = Depends(get_db)):
     school = School(**payload.model_dump())
     db.add(school)
     db.commit()
+    dashboard_metrics.invalidate()
     db.refresh(school)
     return school
 
@@ -51,5 +55,8 @@ def delete_school(school_id: int, db: Session = Depends(get_db)):
     if not school:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="School not found")
 
+    route_ids = [route.id for route in school.routes]
     db.delete(school)
     db.commit()
+    dashboard_metrics.invalidate()
+    route_cache.bump(*route_ids)
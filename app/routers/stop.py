@@ -1,21 +1,55 @@
-﻿from fastapi import APIRouter, Depends, HTTPException, status
+﻿from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import Stop
+from app.database import get_db, get_read_db
+from app.models import Run, Stop
+from app.schemas.bulk import BulkImportResult
 from app.schemas.stop import StopCreate, StopRead, StopUpdate
+from app.utils.bulk_import import BulkSpec, bulk_rows, import_rows
+from app.utils.dashboard_metrics import dashboard_metrics
+from app.utils.pagination import PageParams, page_params, paginate
+from app.utils.route_cache import route_cache
+from app.utils.run_geometry import run_geometry_cache
 
 
 router = APIRouter(prefix="/stops", tags=["stops"])
 
+STOP_BULK_SPEC = BulkSpec(
+    model=Stop,
+    schema=StopCreate,
+    key=(Stop.run_id, Stop.sequence),
+    references={"run_id": Run},
+)
+
+
+def _bump_run_routes(db: Session, *run_ids: int | None) -> None:
+    run_ids = {run_id for run_id in run_ids if run_id is not None}
+    if run_ids:
+        route_cache.bump(*db.scalars(select(Run.route_id).where(Run.id.in_(run_ids))))
+
+
+def _stops_changed(db: Session, stops: list[StopCreate]) -> None:
+    run_ids = {stop.run_id for stop in stops}
+    run_geometry_cache.invalidate(*run_ids)
+    _bump_run_routes(db, *run_ids)
+
 
 @router.get("/", response_model=list[StopRead])
-def list_stops(db: Session = Depends(get_db)):
-    return db.query(Stop).order_by(Stop.run_id, Stop.sequence).all()
+def list_stops(
+    response: Response,
+    run_id: int | None = None,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+):
+    query = db.query(Stop)
+    if run_id is not None:
+        query = query.filter(Stop.run_id == run_id)
+    return paginate(query, page, response, (Stop.run_id, Stop.sequence, Stop.id))
 
 
 @router.get("/{stop_id}", response_model=StopRead)
-def get_stop(stop_id: int, db: Session = Depends(get_db)):
+def get_stop(stop_id: int, db: Session = Depends(get_read_db)):
     stop = db.get(Stop, stop_id)
     if not stop:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stop not found")
@@ -27,20 +61,31 @@ def create_stop(payload: StopCreate, db: Session = Depends(get_db)):
     stop = Stop(**payload.model_dump())
     db.add(stop)
     db.commit()
+    dashboard_metrics.invalidate()
+    run_geometry_cache.invalidate(stop.run_id)
+    _bump_run_routes(db, stop.run_id)
     db.refresh(stop)
     return stop
 
 
+@router.post("/bulk", response_model=BulkImportResult)
+def bulk_create_stops(rows: list = Depends(bulk_rows), db: Session = Depends(get_db)):
+    return import_rows(db, STOP_BULK_SPEC, rows, after_commit=lambda stops: _stops_changed(db, stops))
+
+
 @router.put("/{stop_id}", response_model=StopRead)
 def update_stop(stop_id: int, payload: StopUpdate, db: Session = Depends(get_db)):
     stop = db.get(Stop, stop_id)
     if not stop:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stop not found")
 
+    previous_run_id = stop.run_id
     for key, value in payload.model_dump(exclude_unset=True).items():
         setattr(stop, key, value)
 
     db.commit()
+    run_geometry_cache.invalidate(previous_run_id, stop.run_id)
+    _bump_run_routes(db, previous_run_id, stop.run_id)
     db.refresh(stop)
     return stop
 
@@ -51,5 +96,9 @@ def delete_stop(stop_id: int, db: Session = Depends(get_db)):
     if not stop:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Stop not found")
 
+    run_id = stop.run_id
     db.delete(stop)
     db.commit()
+    dashboard_metrics.invalidate()
+    run_geometry_cache.invalidate(run_id)
+    _bump_run_routes(db, run_id)
@@ -1,21 +1,60 @@
-﻿from fastapi import APIRouter, Depends, HTTPException, status
+﻿from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.models import Student
+from app.database import get_db, get_read_db
+from app.models import Route, School, Student
+from app.schemas.bulk import BulkImportResult
 from app.schemas.student import StudentCreate, StudentRead, StudentUpdate
+from app.utils.bulk_import import BulkSpec, bulk_rows, import_rows
+from app.utils.dashboard_metrics import dashboard_metrics
+from app.utils.export import ExportFormat, export_response
+from app.utils.pagination import PageParams, page_params, paginate
 
 
 router = APIRouter(prefix="/students", tags=["students"])
 
+STUDENT_BULK_SPEC = BulkSpec(
+    model=Student,
+    schema=StudentCreate,
+    key=(Student.last_name, Student.first_name, Student.school_id),
+    references={"route_id": Route, "school_id": School},
+)
+
+
+def _student_filters(route_id: int | None, school_id: int | None) -> list:
+    criteria = []
+    if route_id is not None:
+        criteria.append(Student.route_id == route_id)
+    if school_id is not None:
+        criteria.append(Student.school_id == school_id)
+    return criteria
+
 
 @router.get("/", response_model=list[StudentRead])
-def list_students(db: Session = Depends(get_db)):
-    return db.query(Student).order_by(Student.id).all()
+def list_students(
+    response: Response,
+    route_id: int | None = None,
+    school_id: int | None = None,
+    page: PageParams = Depends(page_params),
+    db: Session = Depends(get_read_db),
+):
+    query = db.query(Student).filter(*_student_filters(route_id, school_id))
+    return paginate(query, page, response, (Student.id,))
+
+
+@router.get("/export")
+def export_students(
+    export_format: ExportFormat = Query("ndjson", alias="format"),
+    route_id: int | None = None,
+    school_id: int | None = None,
+):
+    stmt = select(*Student.__table__.columns).where(*_student_filters(route_id, school_id))
+    return export_response(stmt, (Student.id,), export_format, "students")
 
 
 @router.get("/{student_id}", response_model=StudentRead)
-def get_student(student_id: int, db: Session = Depends(get_db)):
+def get_student(student_id: int, db: Session = Depends(get_read_db)):
     student = db.get(Student, student_id)
     if not student:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Student not found")
@@ -27,10 +66,22 @@ def create_student(payload: StudentCreate, db: Session = Depends(get_db)):
     student = Student(**payload.model_dump())
     db.add(student)
     db.commit()
+    dashboard_metrics.invalidate()
     db.refresh(student)
     return student
 
 
+@router.post("/bulk", response_model=BulkImportResult)
+def bulk_create_students(
+    rows: list = Depends(bulk_rows),
+    dedupe: bool = Query(False, description="Skip rows matching an existing student's name and school"),
+    db: Session = Depends(get_db),
+):
+    # Students have no unique key, so namesakes at one school are only
+    # treated as duplicates when the caller asks for it.
+    return import_rows(db, STUDENT_BULK_SPEC, rows, dedupe=dedupe)
+
+
 @router.put("/{student_id}", response_model=StudentRead)
 def update_student(student_id: int, payload: StudentUpdate, db: Session = Depends(get_db)):
     student = db.get(Student, student_id)
@@ -41,6 +92,7 @@ def update_student(student_id: int, payload: StudentUpdate, db: Session = Depend
         setattr(student, key, value)
 
     db.commit()
+    dashboard_metrics.invalidate()
     db.refresh(student)
     return student
 
@@ -53,3 +105,4 @@ def delete_student(student_id: int, db: Session = Depends(get_db)):
 
     db.delete(student)
     db.commit()
+    dashboard_metrics.invalidate()
@@ -1,8 +1,9 @@
 ﻿from app.schemas.auth import LoginRequest
+from app.schemas.bulk import BulkImportResult, BulkRowResult
 from app.schemas.driver import DriverCreate, DriverRead, DriverUpdate
 from app.schemas.payroll import PayrollCreate, PayrollRead, PayrollUpdate
 from app.schemas.route import RouteCreate, RouteOut, RouteUpdate
-from app.schemas.run import GPSPayload, RunCreate, RunRead, RunUpdate
+from app.schemas.run import GPSPayload, RunCreate, RunPositionRead, RunRead, RunUpdate
 from app.schemas.school import SchoolCreate, SchoolRead, SchoolUpdate
 from app.schemas.stop import StopCreate, StopRead, StopUpdate
 from app.schemas.student import StudentCreate, StudentRead, StudentUpdate
@@ -27,7 +28,10 @@ __all__ = [
     "RunCreate",
     "RunRead",
     "RunUpdate",
+    "RunPositionRead",
     "GPSPayload",
+    "BulkImportResult",
+    "BulkRowResult",
     "PayrollCreate",
     "PayrollRead",
     "PayrollUpdate",
@@ -0,0 +1,17 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class BulkRowResult(BaseModel):
+    row: int
+    status: Literal["created", "duplicate", "error"]
+    id: int | None = None
+    error: str | None = None
+
+
+class BulkImportResult(BaseModel):
+    created: int
+    duplicates: int
+    errors: int
+    results: list[BulkRowResult]
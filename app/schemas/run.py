@@ -32,6 +32,16 @@ class RunRead(RunBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class RunPositionRead(BaseModel):
+    run_id: int
+    recorded_at: datetime
+    latitude: float
+    longitude: float
+    speed_kmh: float | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class GPSPayload(BaseModel):
     latitude: float
     longitude: float
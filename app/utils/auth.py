@@ -1,43 +1,113 @@
-﻿import hashlib
-import secrets
+﻿import threading
+import time
+from dataclasses import dataclass
 
 from fastapi import Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database import get_db
 from app.models import Driver
+from app.utils.invalidation import invalidations
 
 
 SESSION_DRIVER_KEY = "driver_id"
 
 
-def hash_password(password: str, salt: str | None = None) -> str:
-    salt = salt or secrets.token_hex(16)
-    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), 100_000)
-    return f"{salt}${digest.hex()}"
+@dataclass(frozen=True, slots=True)
+class CurrentDriver:
+    """Identity of the logged-in driver, detached from any session."""
 
+    id: int
+    name: str
+    email: str
+    is_active: bool
 
-def verify_password(password: str, stored_hash: str) -> bool:
-    try:
-        salt, digest = stored_hash.split("$", 1)
-    except ValueError:
-        return False
-    check = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), 100_000).hex()
-    return secrets.compare_digest(check, digest)
+    @classmethod
+    def from_driver(cls, driver: Driver) -> "CurrentDriver":
+        return cls(id=driver.id, name=driver.name, email=driver.email, is_active=driver.is_active)
 
 
-def get_current_driver(request: Request, db: Session = Depends(get_db)) -> Driver:
+class DriverAuthCache:
+    """Per-process TTL cache of ``CurrentDriver`` keyed by session driver id.
+
+    ``update_driver`` and ``delete_driver`` invalidate entries after commit,
+    so deactivation takes effect immediately; with a ``topic`` that applies
+    in every worker. Invalidation bumps a generation counter so a lookup that
+    started before the change cannot store the old identity.
+    """
+
+    def __init__(self, ttl: float | None = None, topic: str | None = None) -> None:
+        self.ttl = settings.auth_cache_ttl_seconds if ttl is None else ttl
+        self._items: dict[int, tuple[CurrentDriver, float]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.topic = topic
+        if topic:
+            invalidations.register(topic, self._invalidate_local)
+
+    def lookup(self, db: Session, driver_id: int) -> CurrentDriver | None:
+        item = self._items.get(driver_id)
+        if item is not None and item[1] > time.monotonic():
+            self.hits += 1
+            return item[0]
+
+        self.misses += 1
+        generation = self._generation
+        driver = db.get(Driver, driver_id)
+        if driver is None:
+            return None
+        identity = CurrentDriver.from_driver(driver)
+        with self._lock:
+            if generation == self._generation:
+                self._items[driver_id] = (identity, time.monotonic() + self.ttl)
+        return identity
+
+    def invalidate(self, *driver_ids: int) -> None:
+        if self.topic:
+            invalidations.publish(self.topic, *driver_ids)
+        else:
+            self._invalidate_local(*driver_ids)
+
+    def _invalidate_local(self, *driver_ids: int) -> None:
+        with self._lock:
+            self._generation += 1
+            for driver_id in driver_ids:
+                self._items.pop(driver_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._items.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._items),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+driver_auth_cache = DriverAuthCache(topic="driver_auth")
+
+
+def get_current_driver(request: Request, db: Session = Depends(get_db)) -> CurrentDriver:
     driver_id = request.session.get(SESSION_DRIVER_KEY)
     if not driver_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
-    driver = db.get(Driver, driver_id)
+    driver = driver_auth_cache.lookup(db, driver_id)
     if not driver or not driver.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session")
     return driver
 
 
-def get_current_driver_optional(request: Request, db: Session = Depends(get_db)) -> Driver | None:
+def get_current_driver_optional(request: Request, db: Session = Depends(get_db)) -> CurrentDriver | None:
     driver_id = request.session.get(SESSION_DRIVER_KEY)
     if not driver_id:
         return None
-    return db.get(Driver, driver_id)
+    return driver_auth_cache.lookup(db, driver_id)
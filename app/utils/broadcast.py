@@ -0,0 +1,226 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import time
+from collections import deque
+from collections.abc import Callable
+from pathlib import Path
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[int, str], None]
+Control = Callable[[str, tuple[int, ...]], None]
+
+# Frame kind, then the run id for updates (0 for control messages).
+_FRAME_HEADER = struct.Struct("!BI")
+_UPDATE, _CONTROL = 0, 1
+_MAX_FRAME_BYTES = 65536
+# Keeps a control frame's JSON well under _MAX_FRAME_BYTES.
+_CONTROL_IDS_PER_FRAME = 4096
+_CONTROL_RETRY_SECONDS = 0.01
+
+
+class BroadcastBackend:
+    """Carries encoded run updates to every worker's ``ConnectionManager``.
+
+    ``publish`` must hand the message to the local ``deliver`` callback as
+    well as to any other workers. ``publish_control`` sends a topic and ids
+    to the other workers' ``control`` callback only; the sender has already
+    applied it locally. Both are called on the event loop thread.
+    """
+
+    name = "base"
+
+    def __init__(self) -> None:
+        self._deliver: Deliver = lambda run_id, text: None
+        self._control: Control = lambda topic, ids: None
+
+    def bind(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def bind_control(self, control: Control) -> None:
+        self._control = control
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, run_id: int, text: str) -> None:
+        raise NotImplementedError
+
+    def publish_control(self, topic: str, ids: tuple[int, ...]) -> None:
+        pass
+
+
+class InProcessBackend(BroadcastBackend):
+    name = "memory"
+
+    async def publish(self, run_id: int, text: str) -> None:
+        self._deliver(run_id, text)
+
+
+class UnixSocketBackend(BroadcastBackend):
+    """Brokerless fan-out between workers on one host over Unix datagrams.
+
+    Each worker binds ``worker-<pid>.sock`` in a shared directory and sends
+    every published frame to the other sockets found there. Sends never
+    block. A peer whose receive buffer is full misses that run update, since
+    the next one supersedes it. Control frames are cache invalidations, and
+    some caches have no TTL to recover from a lost one, so they are queued
+    per peer instead and retried in order until the peer takes them. Socket
+    files left by dead workers are removed on the first failed send, along
+    with anything queued for them.
+    """
+
+    name = "unix"
+
+    def __init__(self, directory: str | None = None, peer_refresh_seconds: float = 1.0) -> None:
+        super().__init__()
+        self.directory = Path(directory or settings.broadcast_socket_dir)
+        self.path = self.directory / f"worker-{os.getpid()}.sock"
+        self.peer_refresh_seconds = peer_refresh_seconds
+        self.dropped = 0
+        self.control_retries = 0
+        self._sock: socket.socket | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._peers: list[str] = []
+        self._peers_checked = 0.0
+        self._backlog: dict[str, deque[bytes]] = {}
+        self._retry: asyncio.TimerHandle | None = None
+
+    async def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path.unlink(missing_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(self.path))
+        sock.setblocking(False)
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(sock.fileno(), self._on_readable)
+        self._sock = sock
+
+    async def stop(self) -> None:
+        if self._sock is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        if self._retry is not None:
+            self._retry.cancel()
+            self._retry = None
+        # Last chance for queued invalidations; wait briefly on each peer.
+        self._sock.settimeout(0.5)
+        self._flush_backlog()
+        self._sock.close()
+        self._sock = None
+        self.path.unlink(missing_ok=True)
+
+    async def publish(self, run_id: int, text: str) -> None:
+        self._deliver(run_id, text)
+        self._send(_FRAME_HEADER.pack(_UPDATE, run_id) + text.encode("utf-8"))
+
+    def publish_control(self, topic: str, ids: tuple[int, ...]) -> None:
+        for start in range(0, max(len(ids), 1), _CONTROL_IDS_PER_FRAME):
+            body = json.dumps([topic, list(ids[start : start + _CONTROL_IDS_PER_FRAME])])
+            self._send(_FRAME_HEADER.pack(_CONTROL, 0) + body.encode("utf-8"), reliable=True)
+
+    def _send(self, frame: bytes, reliable: bool = False) -> None:
+        if self._sock is None:
+            return
+        if len(frame) > _MAX_FRAME_BYTES:
+            logger.warning("Dropping %s byte broadcast frame", len(frame))
+            return
+        for peer in self._peer_paths():
+            if reliable and peer in self._backlog:
+                # Keep invalidations for this peer in order behind the queued ones.
+                self._backlog[peer].append(frame)
+                continue
+            try:
+                self._sock.sendto(frame, peer)
+            except BlockingIOError:
+                if reliable:
+                    self._queue(peer, frame)
+                else:
+                    self.dropped += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                self._forget_peer(peer)
+            except OSError as exc:
+                # Skip the peer until the next directory refresh rather than failing the publisher.
+                logger.warning("Broadcast to %s failed: %s", peer, exc)
+                self._peers.remove(peer)
+                if reliable:
+                    self._queue(peer, frame)
+                else:
+                    self.dropped += 1
+
+    def _queue(self, peer: str, frame: bytes) -> None:
+        self.control_retries += 1
+        self._backlog.setdefault(peer, deque()).append(frame)
+        if self._retry is None and self._loop is not None:
+            self._retry = self._loop.call_later(_CONTROL_RETRY_SECONDS, self._flush_backlog)
+
+    def _flush_backlog(self) -> None:
+        self._retry = None
+        if self._sock is None:
+            return
+        for peer, frames in list(self._backlog.items()):
+            while frames:
+                try:
+                    self._sock.sendto(frames[0], peer)
+                except (BlockingIOError, TimeoutError):
+                    break
+                except (ConnectionRefusedError, FileNotFoundError):
+                    self._forget_peer(peer)
+                    break
+                except OSError as exc:
+                    logger.warning("Retrying broadcast to %s failed: %s", peer, exc)
+                    break
+                frames.popleft()
+            if not frames:
+                self._backlog.pop(peer, None)
+        if self._backlog and self._loop is not None and not self._sock.getblocking():
+            self._retry = self._loop.call_later(_CONTROL_RETRY_SECONDS, self._flush_backlog)
+
+    def _forget_peer(self, peer: str) -> None:
+        Path(peer).unlink(missing_ok=True)
+        if peer in self._peers:
+            self._peers.remove(peer)
+        self._backlog.pop(peer, None)
+
+    def _peer_paths(self) -> list[str]:
+        now = time.monotonic()
+        if now - self._peers_checked >= self.peer_refresh_seconds:
+            own = str(self.path)
+            self._peers = [str(p) for p in self.directory.glob("worker-*.sock") if str(p) != own]
+            self._peers_checked = now
+        return list(self._peers)
+
+    def _on_readable(self) -> None:
+        while self._sock is not None:
+            try:
+                data = self._sock.recv(_MAX_FRAME_BYTES)
+            except BlockingIOError:
+                return
+            if len(data) < _FRAME_HEADER.size:
+                continue
+            kind, run_id = _FRAME_HEADER.unpack_from(data)
+            body = data[_FRAME_HEADER.size :].decode("utf-8")
+            if kind == _UPDATE:
+                self._deliver(run_id, body)
+            elif kind == _CONTROL:
+                topic, ids = json.loads(body)
+                self._control(topic, tuple(ids))
+
+
+def create_broadcast_backend(name: str | None = None) -> BroadcastBackend:
+    name = name or settings.broadcast_backend
+    if name == InProcessBackend.name:
+        return InProcessBackend()
+    if name == UnixSocketBackend.name:
+        return UnixSocketBackend()
+    raise ValueError(f"Unknown broadcast backend: {name}")
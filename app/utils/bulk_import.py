@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from itertools import islice
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import InstrumentedAttribute, Session
+
+from app.config import settings
+from app.schemas.bulk import BulkImportResult, BulkRowResult
+from app.utils.dashboard_metrics import dashboard_metrics
+
+
+async def bulk_rows(request: Request) -> list:
+    """Read a bulk request body: a JSON array, or CSV when sent as ``text/csv``.
+
+    Empty CSV cells become ``None`` so optional fields validate the same way
+    as omitted JSON keys.
+    """
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("text/csv"):
+        try:
+            reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+            rows = [{k: (v if v != "" else None) for k, v in row.items() if k is not None} for row in reader]
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid CSV: {exc}") from exc
+    else:
+        try:
+            rows = json.loads(body)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON") from exc
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a JSON array of rows")
+
+    if len(rows) > settings.bulk_import_max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.bulk_import_max_rows} rows per request",
+        )
+    return rows
+
+
+@dataclass(frozen=True)
+class BulkSpec:
+    """How to validate, de-duplicate and insert rows of one model.
+
+    ``key`` columns identify a duplicate, both within the request and against
+    existing rows, when the import de-duplicates; they should be covered by
+    an index. ``references`` maps foreign key fields to the model they
+    must exist in. ``to_values`` turns one chunk of validated payloads into
+    insert parameters.
+    """
+
+    model: type
+    schema: type[BaseModel]
+    key: tuple[InstrumentedAttribute, ...]
+    references: dict[str, type] = field(default_factory=dict)
+    to_values: Callable[[list[BaseModel]], list[dict]] = lambda payloads: [payload.model_dump() for payload in payloads]
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _format_errors(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors())
+
+
+def _existing(db: Session, columns: tuple[InstrumentedAttribute, ...], keys: set[tuple]) -> set[tuple]:
+    # Match whole keys so each chunk is an index lookup rather than a scan.
+    found: set[tuple] = set()
+    for chunk in _chunks(keys, settings.bulk_import_chunk_size):
+        if len(columns) == 1:
+            criterion = columns[0].in_([key[0] for key in chunk])
+        else:
+            criterion = tuple_(*columns).in_(chunk)
+        found.update(tuple(row) for row in db.execute(select(*columns).where(criterion)))
+    return found
+
+
+def _insert(db: Session, stmt, rows: list[tuple[int, dict]], results: dict[int, BulkRowResult]) -> list[int]:
+    """Insert and commit ``rows``, returning the row numbers created.
+
+    On a constraint error the halves are retried separately until the
+    offending rows are isolated and reported as errors.
+    """
+    try:
+        ids = db.scalars(stmt, [values for _, values in rows]).all()
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        if len(rows) == 1:
+            number = rows[0][0]
+            results[number] = BulkRowResult(row=number, status="error", error=f"Rejected by the database: {exc.orig}")
+            return []
+        middle = len(rows) // 2
+        return _insert(db, stmt, rows[:middle], results) + _insert(db, stmt, rows[middle:], results)
+    for (number, _), new_id in zip(rows, ids):
+        results[number] = BulkRowResult(row=number, status="created", id=new_id)
+    return [number for number, _ in rows]
+
+
+def import_rows(
+    db: Session,
+    spec: BulkSpec,
+    rows: list,
+    after_commit: Callable[[list[BaseModel]], None] | None = None,
+    dedupe: bool = True,
+) -> BulkImportResult:
+    """Validate every row up front, then bulk insert the valid, new ones.
+
+    Rows are numbered from 1 in request order. With ``dedupe``, rows whose
+    ``spec.key`` is already stored or earlier in the request are reported as
+    duplicates and skipped. Inserts are executemany
+    statements committed every ``BULK_IMPORT_CHUNK_SIZE`` rows; a chunk that
+    hits a constraint is rolled back and bisected, so only the rows the
+    database rejects are reported as errors and the rest are still created.
+    """
+    results: dict[int, BulkRowResult] = {}
+    valid: dict[int, BaseModel] = {}
+    for number, row in enumerate(rows, start=1):
+        try:
+            valid[number] = spec.schema.model_validate(row)
+        except ValidationError as exc:
+            results[number] = BulkRowResult(row=number, status="error", error=_format_errors(exc))
+
+    for name, target in spec.references.items():
+        wanted = {getattr(payload, name) for payload in valid.values()} - {None}
+        known: set = set()
+        for chunk in _chunks(wanted, settings.bulk_import_chunk_size):
+            known.update(db.scalars(select(target.id).where(target.id.in_(chunk))))
+        for number, payload in list(valid.items()):
+            value = getattr(payload, name)
+            if value is not None and value not in known:
+                results[number] = BulkRowResult(row=number, status="error", error=f"Unknown {name} {value}")
+                del valid[number]
+
+    pending: list[tuple[int, BaseModel]] = list(valid.items())
+    if dedupe:
+        key_names = [column.key for column in spec.key]
+        keys = {number: tuple(getattr(payload, name) for name in key_names) for number, payload in valid.items()}
+        seen = _existing(db, spec.key, set(keys.values()))
+        pending = []
+        for number, payload in valid.items():
+            if keys[number] in seen:
+                results[number] = BulkRowResult(row=number, status="duplicate")
+                continue
+            seen.add(keys[number])
+            pending.append((number, payload))
+
+    stmt = insert(spec.model).returning(spec.model.id, sort_by_parameter_order=True)
+    for chunk in _chunks(pending, settings.bulk_import_chunk_size):
+        # Values are built once per chunk (drivers hash passwords here), not per retry.
+        values = spec.to_values([payload for _, payload in chunk])
+        created = set(_insert(db, stmt, [(number, row) for (number, _), row in zip(chunk, values)], results))
+        if not created:
+            continue
+        dashboard_metrics.invalidate()
+        if after_commit:
+            after_commit([payload for number, payload in chunk if number in created])
+
+    ordered = [results[number] for number in sorted(results)]
+    return BulkImportResult(
+        created=sum(result.status == "created" for result in ordered),
+        duplicates=sum(result.status == "duplicate" for result in ordered),
+        errors=sum(result.status == "error" for result in ordered),
+        results=ordered,
+    )
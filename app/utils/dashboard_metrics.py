@@ -0,0 +1,126 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Driver, Payroll, Route, Run, School, Stop, Student
+from app.utils.invalidation import invalidations
+
+
+@dataclass(frozen=True, slots=True)
+class RecentRun:
+    id: int
+    status: str
+
+
+@dataclass(frozen=True, slots=True)
+class DashboardSnapshot:
+    metrics: dict[str, int]
+    route_load: list[tuple[str, int]]
+    recent_runs: list[RecentRun]
+    computed_at: float
+
+
+def _count(model, *criteria):
+    return select(func.count()).select_from(model).where(*criteria).scalar_subquery()
+
+
+def compute_dashboard(db: Session) -> DashboardSnapshot:
+    counters = db.execute(
+        select(
+            _count(Driver).label("drivers"),
+            _count(School).label("schools"),
+            _count(Student).label("students"),
+            _count(Route).label("routes"),
+            _count(Stop).label("stops"),
+            _count(Run).label("runs"),
+            _count(Run, Run.status == "active").label("active_runs"),
+            _count(Payroll, Payroll.status == "pending").label("pending_payrolls"),
+        )
+    ).one()
+
+    student_counts = (
+        select(Student.route_id, func.count().label("student_count"))
+        .where(Student.route_id.is_not(None))
+        .group_by(Student.route_id)
+        .subquery()
+    )
+    student_count = func.coalesce(student_counts.c.student_count, 0)
+    route_load = db.execute(
+        select(Route.name, student_count)
+        .outerjoin(student_counts, student_counts.c.route_id == Route.id)
+        .order_by(student_count.desc())
+        .limit(5)
+    ).all()
+
+    recent_runs = db.execute(select(Run.id, Run.status).order_by(Run.id.desc()).limit(8)).all()
+
+    return DashboardSnapshot(
+        metrics=dict(counters._mapping),
+        route_load=[(name, count) for name, count in route_load],
+        recent_runs=[RecentRun(id=run_id, status=run_status) for run_id, run_status in recent_runs],
+        computed_at=time.monotonic(),
+    )
+
+
+class DashboardMetricsCache:
+    """Per-process dashboard snapshot, recomputed at most once per TTL.
+
+    CRUD routers call ``invalidate`` after committing changes that move a
+    counter, so the next page load recomputes instead of waiting out the TTL;
+    with a ``topic`` that applies in every worker. Only one request
+    recomputes at a time; concurrent loads wait for it and share the result.
+    """
+
+    def __init__(self, ttl: float | None = None, topic: str | None = None) -> None:
+        self.ttl = settings.dashboard_cache_ttl_seconds if ttl is None else ttl
+        self._snapshot: DashboardSnapshot | None = None
+        self._snapshot_generation = -1
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.topic = topic
+        if topic:
+            invalidations.register(topic, self._invalidate_local)
+
+    def _fresh(self) -> DashboardSnapshot | None:
+        snapshot = self._snapshot
+        if snapshot is None or self._snapshot_generation != self._generation:
+            return None
+        if time.monotonic() - snapshot.computed_at >= self.ttl:
+            return None
+        return snapshot
+
+    def get(self, db: Session) -> DashboardSnapshot:
+        snapshot = self._fresh()
+        if snapshot is not None:
+            self.hits += 1
+            return snapshot
+        with self._lock:
+            snapshot = self._fresh()
+            if snapshot is not None:
+                self.hits += 1
+                return snapshot
+            self.misses += 1
+            generation = self._generation
+            snapshot = compute_dashboard(db)
+            self._snapshot = snapshot
+            # A write committed while computing leaves this snapshot stale.
+            self._snapshot_generation = generation
+            return snapshot
+
+    def invalidate(self) -> None:
+        if self.topic:
+            invalidations.publish(self.topic)
+        else:
+            self._invalidate_local()
+
+    def _invalidate_local(self) -> None:
+        self._generation += 1
+
+
+dashboard_metrics = DashboardMetricsCache(topic="dashboard")
@@ -0,0 +1,64 @@
+import asyncio
+import contextvars
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+
+
+T = TypeVar("T")
+
+
+class DBExecutor:
+    """Runs blocking SQLAlchemy work off the event loop.
+
+    Work items are callables taking a fresh ``Session``. At most ``max_pending``
+    items may be queued or running at once; further callers wait on the
+    semaphore, which gives async producers backpressure instead of an
+    unbounded backlog.
+    """
+
+    def __init__(self, workers: int | None = None, max_pending: int | None = None) -> None:
+        self.workers = workers or settings.db_executor_workers
+        self.max_pending = max_pending or settings.db_executor_max_pending
+        self._pool: ThreadPoolExecutor | None = None
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sbt-db")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        self.start()
+        async with self._slots:
+            # Only touched on the loop thread, like the semaphore itself.
+            self._pending += 1
+            try:
+                loop = asyncio.get_running_loop()
+                # Carry context variables (the active SQL profile) into the worker thread.
+                context = contextvars.copy_context()
+                return await loop.run_in_executor(self._pool, context.run, _call_with_session, fn, args)
+            finally:
+                self._pending -= 1
+
+
+def _call_with_session(fn: Callable[..., T], args: tuple) -> T:
+    db: Session = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
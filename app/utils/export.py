@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+from collections.abc import Iterator
+from datetime import date, datetime
+from typing import Literal
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.orm import InstrumentedAttribute
+
+from app.config import settings
+from app.database import ReadSessionLocal
+from app.utils.pagination import keyset_after
+
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def iter_export(
+    stmt: Select,
+    keys: tuple[InstrumentedAttribute, ...],
+    export_format: ExportFormat,
+    chunk_size: int | None = None,
+) -> Iterator[str]:
+    """Yield ``stmt``'s rows as NDJSON or CSV text, one chunk per keyset page.
+
+    ``keys`` must identify a row uniquely and be among the selected columns.
+    Each chunk is its own short query and session, closed before the chunk is
+    yielded: under the rollback journal an open read keeps SQLite's shared
+    lock and blocks every writer for as long as a slow client takes to drain
+    the stream. Rows written mid-export may or may not be included. Rows are
+    plain column tuples, so no ORM objects or response models are built and
+    memory stays bounded by ``chunk_size``.
+    """
+    chunk_size = chunk_size or settings.export_chunk_size
+    stmt = stmt.order_by(*keys).limit(chunk_size)
+    columns = list(stmt.selected_columns.keys())
+    positions = [columns.index(key.key) for key in keys]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if export_format == "csv":
+        writer.writerow(columns)
+        yield buffer.getvalue()
+
+    after = None
+    while True:
+        page = stmt if after is None else stmt.where(keyset_after(keys, after))
+        with ReadSessionLocal() as db:
+            rows = db.execute(page).all()
+        if not rows:
+            return
+        buffer.seek(0)
+        buffer.truncate()
+        if export_format == "csv":
+            writer.writerows([_csv_value(value) for value in row] for row in rows)
+        else:
+            for row in rows:
+                buffer.write(json.dumps(dict(zip(columns, row)), default=_json_default, separators=(",", ":")))
+                buffer.write("\n")
+        yield buffer.getvalue()
+        if len(rows) < chunk_size:
+            return
+        after = tuple(rows[-1][position] for position in positions)
+
+
+def export_response(
+    stmt: Select, keys: tuple[InstrumentedAttribute, ...], export_format: ExportFormat, filename: str
+) -> StreamingResponse:
+    extension = "csv" if export_format == "csv" else "ndjson"
+    return StreamingResponse(
+        iter_export(stmt, keys, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    )
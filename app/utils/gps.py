@@ -1,16 +1,22 @@
 ﻿import math
 from collections.abc import Sequence
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
+import numpy as np
+
 from app.config import settings
 
 
+EARTH_RADIUS_M = 6_371_000
+
+
 def validate_gps(latitude: float, longitude: float) -> bool:
     return -90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0
 
 
 def haversine_meters(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    radius = 6_371_000
+    radius = EARTH_RADIUS_M
     phi1 = math.radians(lat1)
     phi2 = math.radians(lat2)
     d_phi = math.radians(lat2 - lat1)
@@ -39,6 +45,175 @@ def compute_nearest_stop(latitude: float, longitude: float, stops: Sequence) ->
     return best_stop, best_distance, best_index
 
 
+def compute_nearest_index(
+    latitude: float, longitude: float, latitudes: Sequence[float], longitudes: Sequence[float]
+) -> tuple[int, float]:
+    best_index = -1
+    best_distance = float("inf")
+
+    for index, (stop_lat, stop_lon) in enumerate(zip(latitudes, longitudes)):
+        dist = haversine_meters(latitude, longitude, stop_lat, stop_lon)
+        if dist < best_distance:
+            best_distance = dist
+            best_index = index
+
+    return best_index, best_distance
+
+
+def haversine_meters_batch(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Element-wise haversine distance; arguments broadcast like NumPy arrays."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    d_phi = np.radians(np.subtract(lat2, lat1))
+    d_lambda = np.radians(np.subtract(lon2, lon1))
+
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_M * c
+
+
+def compute_nearest_index_batch(
+    latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray
+) -> tuple[int, float]:
+    if len(latitudes) == 0:
+        return -1, float("inf")
+    distances = haversine_meters_batch(latitude, longitude, latitudes, longitudes)
+    index = int(np.argmin(distances))
+    return index, float(distances[index])
+
+
+def compute_nearest_indices_batch(
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    stop_latitudes: Sequence[np.ndarray],
+    stop_longitudes: Sequence[np.ndarray],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Nearest stop for N buses at once, each against its own run's stops.
+
+    Bus ``i`` at ``(latitudes[i], longitudes[i])`` is matched against
+    ``stop_latitudes[i]`` / ``stop_longitudes[i]``. Returns per-bus stop
+    indices and distances; buses whose run has no stops get ``-1`` / ``inf``.
+    """
+    counts = np.fromiter((len(lats) for lats in stop_latitudes), dtype=np.intp, count=len(stop_latitudes))
+    indices = np.full(len(counts), -1, dtype=np.intp)
+    distances = np.full(len(counts), np.inf)
+    if not counts.any():
+        return indices, distances
+
+    bus_lat = np.repeat(np.asarray(latitudes, dtype=np.float64), counts)
+    bus_lon = np.repeat(np.asarray(longitudes, dtype=np.float64), counts)
+    all_dist = haversine_meters_batch(bus_lat, bus_lon, np.concatenate(stop_latitudes), np.concatenate(stop_longitudes))
+
+    has_stops = counts > 0
+    starts = (np.cumsum(counts) - counts)[has_stops]
+    minima = np.minimum.reduceat(all_dist, starts)
+    # First position in each run's segment that attains the minimum, matching np.argmin tie-breaking.
+    hits = np.flatnonzero(all_dist == np.repeat(minima, counts[has_stops]))
+    first = hits[np.searchsorted(hits, starts)]
+    indices[has_stops] = first - starts
+    distances[has_stops] = minima
+    return indices, distances
+
+
+def cumulative_path_meters(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Distance along the stop sequence from the first stop to each stop."""
+    cumulative = np.zeros(len(latitudes))
+    if len(latitudes) > 1:
+        legs = haversine_meters_batch(latitudes[:-1], longitudes[:-1], latitudes[1:], longitudes[1:])
+        np.cumsum(legs, out=cumulative[1:])
+    return cumulative
+
+
+def project_onto_segment(
+    latitude: float, longitude: float, a_lat: float, a_lon: float, b_lat: float, b_lon: float
+) -> tuple[float, float]:
+    """Project a point onto segment A-B in a local equirectangular frame.
+
+    Returns the unclamped position along the segment (0 at A, 1 at B) and the
+    distance in meters from the point to the closest point of the segment.
+    """
+    meters_per_deg = math.radians(EARTH_RADIUS_M)
+    kx = math.cos(math.radians(a_lat)) * meters_per_deg
+    bx, by = (b_lon - a_lon) * kx, (b_lat - a_lat) * meters_per_deg
+    px, py = (longitude - a_lon) * kx, (latitude - a_lat) * meters_per_deg
+
+    length_sq = bx * bx + by * by
+    t = (px * bx + py * by) / length_sq if length_sq > 0 else 0.0
+    clamped = min(1.0, max(0.0, t))
+    return t, math.hypot(px - clamped * bx, py - clamped * by)
+
+
+@dataclass(slots=True)
+class RouteProgressCursor:
+    """Monotonic position of a bus along its run's stop-to-stop path.
+
+    Each fix is projected onto the current segment and the next
+    ``progress_search_window`` segments only. The cursor moves to a later
+    segment when that segment is closer by more than
+    ``progress_hysteresis_meters`` or the bus has passed the end of the
+    current one, and never moves backwards. A full forward scan happens only
+    when the fix is more than ``progress_resync_meters`` off the window.
+    """
+
+    segment: int = 0
+    along_m: float = 0.0
+
+    def advance(
+        self, latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray, cumulative_m: np.ndarray
+    ) -> None:
+        last_segment = len(latitudes) - 2
+        if last_segment < 0:
+            return
+
+        def project(segment: int) -> tuple[float, float]:
+            return project_onto_segment(
+                latitude,
+                longitude,
+                float(latitudes[segment]),
+                float(longitudes[segment]),
+                float(latitudes[segment + 1]),
+                float(longitudes[segment + 1]),
+            )
+
+        self.segment = min(self.segment, last_segment)
+        current_t, current_offset = project(self.segment)
+        segment, t, offset = self.segment, current_t, current_offset
+
+        window_end = min(self.segment + settings.progress_search_window, last_segment)
+        candidates = [(*project(seg), seg) for seg in range(self.segment + 1, window_end + 1)]
+        if candidates:
+            ahead_t, ahead_offset, ahead_segment = min(candidates, key=lambda c: c[1])
+            if ahead_offset + settings.progress_hysteresis_meters < current_offset or current_t >= 1.0:
+                segment, t, offset = ahead_segment, ahead_t, ahead_offset
+
+        if offset > settings.progress_resync_meters and window_end < last_segment:
+            far_t, far_offset, far_segment = min(
+                ((*project(seg), seg) for seg in range(window_end + 1, last_segment + 1)), key=lambda c: c[1]
+            )
+            if far_offset + settings.progress_hysteresis_meters < offset:
+                segment, t = far_segment, far_t
+
+        start_m = float(cumulative_m[segment])
+        along = start_m + min(1.0, max(0.0, t)) * (float(cumulative_m[segment + 1]) - start_m)
+        self.segment = segment
+        self.along_m = max(self.along_m, along)
+
+    def current_index(self, total_stops: int, cumulative_m: np.ndarray) -> int:
+        if total_stops <= 1:
+            return total_stops - 1
+        if self.along_m >= float(cumulative_m[-1]):
+            return total_stops - 1
+        return self.segment
+
+    def progress_percent(self, total_stops: int, cumulative_m: np.ndarray) -> float:
+        if total_stops <= 0:
+            return 0.0
+        if total_stops == 1:
+            return 100.0
+        total_m = float(cumulative_m[-1])
+        return max(0.0, min(100.0, self.along_m / total_m * 100)) if total_m > 0 else 0.0
+
+
 def get_ordered_run_stops(run: object) -> list[object]:
     return sorted(getattr(run, "stops", []) or [], key=lambda s: s.sequence)
 
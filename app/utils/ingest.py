@@ -0,0 +1,87 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from app.config import settings
+from app.utils.gps import haversine_meters
+
+
+@dataclass(slots=True)
+class RunIngestState:
+    accepted_lat: float
+    accepted_lon: float
+    accepted_at: float
+    seen_lat: float
+    seen_lon: float
+    seen_at: float
+    accepted: int = 0
+    suppressed: int = 0
+
+
+class GPSIngestPolicy:
+    """Decides which driver fixes go through the full GPS pipeline.
+
+    A fix is accepted when ``max_staleness`` seconds have passed since the
+    last accepted fix for the run, or when at least ``min_interval`` seconds
+    have passed and the bus moved ``min_distance_m`` or more. Suppressed fixes
+    only update the run's last-seen position here (callers keep it in
+    ``position_buffer`` too, unpersisted). Per-run state is dropped when the
+    run ends.
+    """
+
+    def __init__(
+        self,
+        min_interval: float | None = None,
+        min_distance_m: float | None = None,
+        max_staleness: float | None = None,
+    ) -> None:
+        self.min_interval = settings.gps_min_interval_seconds if min_interval is None else min_interval
+        self.min_distance_m = settings.gps_min_distance_meters if min_distance_m is None else min_distance_m
+        self.max_staleness = settings.gps_max_staleness_seconds if max_staleness is None else max_staleness
+        self._runs: dict[int, RunIngestState] = {}
+        self._lock = threading.Lock()
+
+    def accept(self, run_id: int, latitude: float, longitude: float, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._runs.get(run_id)
+            if state is None:
+                self._runs[run_id] = RunIngestState(latitude, longitude, now, latitude, longitude, now, accepted=1)
+                return True
+
+            state.seen_lat, state.seen_lon, state.seen_at = latitude, longitude, now
+            elapsed = now - state.accepted_at
+            if elapsed >= self.max_staleness or (
+                elapsed >= self.min_interval
+                and haversine_meters(state.accepted_lat, state.accepted_lon, latitude, longitude) >= self.min_distance_m
+            ):
+                state.accepted_lat, state.accepted_lon, state.accepted_at = latitude, longitude, now
+                state.accepted += 1
+                return True
+
+            state.suppressed += 1
+            return False
+
+    def forget(self, *run_ids: int) -> None:
+        with self._lock:
+            for run_id in run_ids:
+                self._runs.pop(run_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            runs = {run_id: {"accepted": s.accepted, "suppressed": s.suppressed} for run_id, s in self._runs.items()}
+        accepted = sum(r["accepted"] for r in runs.values())
+        suppressed = sum(r["suppressed"] for r in runs.values())
+        total = accepted + suppressed
+        return {
+            "min_interval_seconds": self.min_interval,
+            "min_distance_meters": self.min_distance_m,
+            "max_staleness_seconds": self.max_staleness,
+            "accepted": accepted,
+            "suppressed": suppressed,
+            "suppressed_ratio": round(suppressed / total, 4) if total else 0.0,
+            "runs": runs,
+        }
+
+
+ingest_policy = GPSIngestPolicy()
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import threading
+from collections.abc import Callable
+
+from app.utils.broadcast import BroadcastBackend
+
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[..., None]
+
+# Published with the ids of runs that finished or were deleted.
+RUN_ENDED = "run_ended"
+
+
+class InvalidationBus:
+    """Applies per-process cache invalidations in every worker.
+
+    Caches register handlers for their topic. ``publish`` runs the handlers
+    in this worker straight away, on the caller's thread, then hands the
+    topic and ids to the broadcast backend so the other workers run the same
+    handlers. Handlers registered ``on_loop`` own state the event loop
+    mutates, so when published from another thread they are scheduled on
+    the loop instead. Until ``attach`` is called (CLI tools, benchmarks) only
+    the local handlers run, all on the caller's thread.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: dict[str, list[tuple[Handler, bool]]] = {}
+        self._backend: BroadcastBackend | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    def register(self, topic: str, handler: Handler, on_loop: bool = False) -> None:
+        self._handlers.setdefault(topic, []).append((handler, on_loop))
+
+    def attach(self, backend: BroadcastBackend, loop: asyncio.AbstractEventLoop) -> None:
+        with self._lock:
+            backend.bind_control(self.receive)
+            self._backend, self._loop = backend, loop
+
+    def detach(self) -> None:
+        with self._lock:
+            self._backend = self._loop = None
+
+    def publish(self, topic: str, *ids: int) -> None:
+        self._run(topic, ids)
+        with self._lock:
+            backend, loop = self._backend, self._loop
+        if backend is None or loop is None:
+            return
+        try:
+            # Backends send on the loop thread; writers are usually on threadpool threads.
+            loop.call_soon_threadsafe(backend.publish_control, topic, ids)
+        except RuntimeError:
+            # Loop already closed during shutdown.
+            pass
+
+    def receive(self, topic: str, ids: tuple[int, ...]) -> None:
+        try:
+            self._run(topic, ids)
+        except Exception:
+            logger.exception("Failed to apply %s invalidation from another worker", topic)
+
+    def _run(self, topic: str, ids: tuple[int, ...]) -> None:
+        handlers = self._handlers.get(topic)
+        if not handlers:
+            logger.warning("Ignoring invalidation for unknown topic %r", topic)
+            return
+        loop = self._loop
+        for handler, on_loop in handlers:
+            if on_loop and loop is not None and not _running_on(loop):
+                try:
+                    loop.call_soon_threadsafe(handler, *ids)
+                except RuntimeError:
+                    # Loop already closed during shutdown.
+                    pass
+            else:
+                handler(*ids)
+
+
+def _running_on(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+invalidations = InvalidationBus()
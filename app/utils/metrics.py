@@ -0,0 +1,211 @@
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+FANOUT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+Sample = tuple[dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _labels(self, values: tuple) -> dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> Iterable[tuple[str, dict[str, str], float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+        for labelvalues, value in values:
+            yield self.name, self._labels(labelvalues), value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = HTTP_BUCKETS) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = buckets
+        # Per label set: [per-bucket counts (last is +Inf), sum].
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(labelvalues, list(counts), total) for labelvalues, (counts, total) in self._values.items()]
+        for labelvalues, counts, total in values:
+            labels = self._labels(labelvalues)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Collected:
+    """Gauge-style family whose samples are read from live state at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read: Callable[[], Iterable[Sample]]) -> None:
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def samples(self):
+        for labels, value in self.read():
+            yield self.name, labels, value
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = HTTP_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def collected(self, name: str, help_text: str, read: Callable[[], Iterable[Sample]]) -> Collected:
+        return self.register(Collected(name, help_text, read))
+
+    def render(self) -> str:
+        """All families in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter("sbt_http_requests_total", "HTTP responses by route template and status.", ("method", "route", "status"))
+http_duration = registry.histogram(
+    "sbt_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+db_queries = registry.histogram(
+    "sbt_db_query_duration_seconds", "SQL statement execution time.", ("engine",), buckets=DB_BUCKETS
+)
+db_errors = registry.counter("sbt_db_query_errors_total", "SQL statements that raised.", ("engine",))
+gps_fixes = registry.counter(
+    "sbt_gps_fixes_total", "Driver GPS fixes by ingest outcome (accepted, suppressed, rejected).", ("outcome",)
+)
+gps_broadcasts = registry.counter("sbt_gps_broadcasts_total", "Run updates published by this worker.")
+ws_deliveries = registry.counter("sbt_ws_deliveries_total", "Run update frames queued to websocket subscribers.")
+broadcast_fanout = registry.histogram(
+    "sbt_broadcast_fanout_seconds", "Time to queue one run update to every subscriber.", buckets=FANOUT_BUCKETS
+)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency and status per route template.
+
+    The route label is the matched path template (``/runs/{run_id}``), never
+    the raw path, so label cardinality stays bounded. WebSocket and lifespan
+    scopes pass straight through.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or scope.get("root_path") or "unmatched"
+            method = scope["method"]
+            http_duration.observe(time.perf_counter() - started, method, template)
+            http_requests.inc(method, template, str(status_code))
+
+
+def instrument_engine(engine: Engine, label: str) -> None:
+    """Time every statement ``engine`` executes into ``sbt_db_query_duration_seconds``."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._sbt_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany) -> None:
+        db_queries.observe(time.perf_counter() - context._sbt_started, label)
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(exception_context) -> None:
+        db_errors.inc(label)
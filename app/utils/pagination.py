@@ -0,0 +1,80 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import tuple_
+from sqlalchemy.orm import InstrumentedAttribute, Query as ORMQuery
+
+from app.config import settings
+
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass(frozen=True)
+class PageParams:
+    cursor: str | None
+    limit: int
+
+
+def page_params(
+    cursor: str | None = Query(None, description=f"Opaque cursor from the previous page's {NEXT_CURSOR_HEADER} header"),
+    limit: int = Query(settings.page_size_default, ge=1, le=settings.page_size_max),
+) -> PageParams:
+    return PageParams(cursor=cursor, limit=limit)
+
+
+def encode_cursor(values: tuple) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: tuple[InstrumentedAttribute, ...]) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keys):
+            raise ValueError("cursor length mismatch")
+        return tuple(_from_json(value, key) for value, key in zip(values, keys))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def _from_json(value, key: InstrumentedAttribute):
+    python_type = key.property.columns[0].type.python_type
+    if python_type in (date, datetime) and isinstance(value, str):
+        return python_type.fromisoformat(value)
+    return value
+
+
+def keyset_after(keys: tuple[InstrumentedAttribute, ...], values: tuple, descending: bool = False):
+    """Filter for rows that come after ``values`` in ``keys`` order."""
+    left = keys[0] if len(keys) == 1 else tuple_(*keys)
+    right = values[0] if len(keys) == 1 else tuple_(*values)
+    return left < right if descending else left > right
+
+
+def paginate(
+    query: ORMQuery,
+    page: PageParams,
+    response: Response,
+    keys: tuple[InstrumentedAttribute, ...],
+    descending: bool = False,
+) -> list:
+    """Keyset pagination over ``keys``, which must identify a row uniquely.
+
+    Rows come back ordered by ``keys``; when more rows follow, the cursor for
+    the next page is set in the ``X-Next-Cursor`` response header.
+    """
+    if page.cursor:
+        query = query.filter(keyset_after(keys, decode_cursor(page.cursor, keys), descending))
+
+    order = [key.desc() for key in keys] if descending else list(keys)
+    rows = query.order_by(*order).limit(page.limit + 1).all()
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(tuple(getattr(last, key.key) for key in keys))
+    return rows
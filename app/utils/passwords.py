@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import multiprocessing
+import secrets
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from concurrent.futures.process import BrokenProcessPool
+
+from app.config import settings
+
+
+ALGORITHM = "pbkdf2_sha256"
+LEGACY_ITERATIONS = 100_000
+
+
+def hash_password(password: str, salt: str | None = None, iterations: int | None = None) -> str:
+    salt = salt or secrets.token_hex(16)
+    iterations = iterations or settings.password_hash_iterations
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), iterations)
+    return f"{ALGORITHM}${iterations}${salt}${digest.hex()}"
+
+
+def _parse(stored_hash: str) -> tuple[int, str, str] | None:
+    parts = stored_hash.split("$")
+    if len(parts) == 2:
+        # Hashes written before the work factor was stored: "<salt>$<hex>".
+        return LEGACY_ITERATIONS, parts[0], parts[1]
+    if len(parts) == 4 and parts[0] == ALGORITHM and parts[1].isdigit():
+        return int(parts[1]), parts[2], parts[3]
+    return None
+
+
+def verify_password(password: str, stored_hash: str) -> bool:
+    parsed = _parse(stored_hash)
+    if parsed is None:
+        return False
+    iterations, salt, digest = parsed
+    check = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), iterations).hex()
+    return secrets.compare_digest(check, digest)
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    parsed = _parse(stored_hash)
+    return parsed is None or stored_hash.count("$") != 3 or parsed[0] != settings.password_hash_iterations
+
+
+def _verify(password: str, stored_hash: str) -> tuple[bool, bool]:
+    ok = verify_password(password, stored_hash)
+    return ok, ok and needs_rehash(stored_hash)
+
+
+def _hash_many(passwords: list[str], iterations: int) -> list[str]:
+    return [hash_password(password, iterations=iterations) for password in passwords]
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full or a hash did not finish in time."""
+
+
+class PasswordHasher:
+    """PBKDF2 hashing on a dedicated process pool, off the shared threadpool.
+
+    At most ``max_pending`` jobs may be queued or running at once; callers
+    beyond that get ``PasswordHasherBusy`` immediately rather than waiting,
+    so a login storm is shed instead of tying up threads that GPS and CRUD
+    requests need. Admin hashing (``hash_blocking``) counts against the same
+    limit. A job's slot is held until the job actually ends, even if the
+    caller gave up after ``timeout`` seconds. When the pool is not started,
+    async callers hash on a worker thread and ``hash_blocking`` hashes inline.
+    """
+
+    def __init__(self, workers: int | None = None, max_pending: int | None = None, timeout: float | None = None) -> None:
+        self.workers = workers or settings.password_pool_workers
+        self.max_pending = max_pending or settings.password_pool_max_pending
+        self.timeout = timeout or settings.password_hash_timeout_seconds
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn: forking a process that already runs the event loop and
+        # threadpool could copy held locks into the workers.
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = self._new_pool()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _restart(self, broken: ProcessPoolExecutor) -> None:
+        # A worker died; replace the pool so later requests recover. Only the
+        # first caller to notice swaps it, and nobody waits on the old one.
+        with self._lock:
+            if self._pool is not broken:
+                return
+            self._pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _admit(self, jobs: int = 1) -> None:
+        with self._lock:
+            if self._pending + jobs > self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy("Password hashing queue is full")
+            self._pending += jobs
+
+    def _release(self, jobs: int = 1) -> None:
+        with self._lock:
+            self._pending -= jobs
+
+    def _timed_out(self) -> PasswordHasherBusy:
+        with self._lock:
+            self.timed_out += 1
+        return PasswordHasherBusy("Password hashing timed out")
+
+    def _start_job(self, pool: ProcessPoolExecutor, fn, *args) -> Future:
+        """Submit an admitted job; its slot is released when the job ends."""
+        try:
+            future = pool.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    async def _submit(self, fn, *args):
+        pool = self._pool
+        if pool is None:
+            return await asyncio.to_thread(fn, *args)
+        self._admit()
+        try:
+            future = self._start_job(pool, fn, *args)
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+            except asyncio.TimeoutError as exc:
+                # Drops the job if it is still queued; one already running
+                # keeps its slot until it finishes.
+                future.cancel()
+                raise self._timed_out() from exc
+        except BrokenProcessPool as exc:
+            self._restart(pool)
+            raise PasswordHasherBusy("Password hashing pool restarted") from exc
+
+    async def verify(self, password: str, stored_hash: str) -> tuple[bool, bool]:
+        """Return ``(matches, needs_rehash)``."""
+        return await self._submit(_verify, password, stored_hash)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password, None, settings.password_hash_iterations)
+
+    def hash_blocking(self, passwords: list[str]) -> list[str]:
+        """Hash from sync code (threadpool endpoints), fanned out across the pool.
+
+        Admin paths such as driver create and bulk import use this. One
+        password per job, at most ``workers`` jobs in flight, on admission
+        slots taken up front so a large import is rejected as a whole instead
+        of starving logins halfway through. Like a login hash, each job must
+        finish within ``timeout`` seconds of being submitted, so a wedged pool
+        fails the call after ``timeout`` whatever the number of rows. Raises
+        ``PasswordHasherBusy`` like the async methods.
+        """
+        iterations = settings.password_hash_iterations
+        pool = self._pool
+        if pool is None or not passwords:
+            return _hash_many(passwords, iterations)
+        window = min(len(passwords), self.workers, self.max_pending)
+        self._admit(window)
+        hashes: list[str] = [""] * len(passwords)
+        queued = iter(enumerate(passwords))
+        in_flight: dict[Future, tuple[int, float]] = {}
+
+        def submit(count: int) -> None:
+            for index, password in islice(queued, count):
+                in_flight[pool.submit(hash_password, password, None, iterations)] = (index, time.monotonic())
+
+        try:
+            submit(window)
+            while in_flight:
+                oldest = min(submitted for _, submitted in in_flight.values())
+                done, _ = wait(in_flight, timeout=max(0.0, oldest + self.timeout - time.monotonic()), return_when=FIRST_COMPLETED)
+                if not done:
+                    raise self._timed_out()
+                for future in done:
+                    index, _ = in_flight.pop(future)
+                    hashes[index] = future.result()
+                # Finished jobs hand their slots to the next passwords.
+                submit(len(done))
+            return hashes
+        except BrokenProcessPool as exc:
+            self._restart(pool)
+            raise PasswordHasherBusy("Password hashing pool restarted") from exc
+        finally:
+            # Slots of jobs still queued or running are freed when they end.
+            for future in in_flight:
+                future.cancel()
+                future.add_done_callback(lambda _: self._release())
+            self._release(window - len(in_flight))
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Run, RunPosition
+from app.utils.invalidation import invalidations
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class PositionFix:
+    latitude: float
+    longitude: float
+    updated_at: datetime
+    speed_kmh: float | None = None
+
+
+_flush_stmt = (
+    update(Run.__table__)
+    .where(Run.__table__.c.id == bindparam("run_id"))
+    .values(
+        last_latitude=bindparam("latitude"),
+        last_longitude=bindparam("longitude"),
+        last_updated=bindparam("updated_at"),
+    )
+)
+_history_stmt = insert(RunPosition.__table__).prefix_with("OR IGNORE", dialect="sqlite")
+
+
+class PositionBuffer:
+    """Write-behind buffer holding the latest GPS fix per run.
+
+    ``record`` only touches memory. ``flush`` writes every dirty run in a
+    single executemany UPDATE and appends every buffered fix to the
+    ``run_positions`` history in the same transaction; fixes stay visible
+    through ``get`` until that transaction has committed. ``see`` keeps a
+    fix the ingest policy suppressed: it is served by ``get`` but never
+    flushed or broadcast, and is superseded by the next ``record`` or once it
+    is older than ``GPS_MAX_STALENESS_SECONDS``. With a ``topic``,
+    ``discard`` drops a deleted run's fixes in every worker.
+    """
+
+    def __init__(self, topic: str | None = None) -> None:
+        self._dirty: dict[int, PositionFix] = {}
+        self._flushing: dict[int, PositionFix] = {}
+        self._seen: dict[int, PositionFix] = {}
+        self._history: list[tuple[int, PositionFix]] = []
+        self._lock = threading.Lock()
+        self.topic = topic
+        if topic:
+            invalidations.register(topic, self._discard_local)
+
+    def __len__(self) -> int:
+        return len(self._dirty)
+
+    def record(
+        self,
+        run_id: int,
+        latitude: float,
+        longitude: float,
+        speed_kmh: float | None = None,
+        updated_at: datetime | None = None,
+    ) -> None:
+        fix = PositionFix(latitude, longitude, updated_at or datetime.utcnow(), speed_kmh)
+        with self._lock:
+            self._dirty[run_id] = fix
+            self._history.append((run_id, fix))
+            self._seen.pop(run_id, None)
+
+    def see(
+        self,
+        run_id: int,
+        latitude: float,
+        longitude: float,
+        speed_kmh: float | None = None,
+        updated_at: datetime | None = None,
+    ) -> None:
+        fix = PositionFix(latitude, longitude, updated_at or datetime.utcnow(), speed_kmh)
+        with self._lock:
+            self._seen[run_id] = fix
+
+    def get(self, run_id: int) -> PositionFix | None:
+        with self._lock:
+            seen = self._seen.get(run_id)
+            if seen is not None:
+                # Past the staleness limit an accepted fix has been recorded,
+                # possibly by another worker, so the flushed row is newer.
+                if (datetime.utcnow() - seen.updated_at).total_seconds() < settings.gps_max_staleness_seconds:
+                    return seen
+                del self._seen[run_id]
+            return self._dirty.get(run_id) or self._flushing.get(run_id)
+
+    def forget(self, *run_ids: int) -> None:
+        """Drop suppressed fixes of runs that ended; pending writes still flush."""
+        with self._lock:
+            for run_id in run_ids:
+                self._seen.pop(run_id, None)
+
+    def discard(self, *run_ids: int) -> None:
+        if self.topic:
+            invalidations.publish(self.topic, *run_ids)
+        else:
+            self._discard_local(*run_ids)
+
+    def _discard_local(self, *run_ids: int) -> None:
+        with self._lock:
+            for run_id in run_ids:
+                self._dirty.pop(run_id, None)
+                self._flushing.pop(run_id, None)
+                self._seen.pop(run_id, None)
+            self._history = [item for item in self._history if item[0] not in run_ids]
+
+    def flush(self, db: Session) -> int:
+        with self._lock:
+            if not self._dirty:
+                return 0
+            self._flushing, self._dirty = self._dirty, {}
+            batch = dict(self._flushing)
+            history, self._history = self._history, []
+
+        try:
+            db.execute(
+                _flush_stmt,
+                [
+                    {"run_id": run_id, "latitude": fix.latitude, "longitude": fix.longitude, "updated_at": fix.updated_at}
+                    for run_id, fix in batch.items()
+                ],
+            )
+            if history:
+                db.execute(
+                    _history_stmt,
+                    [
+                        {
+                            "run_id": run_id,
+                            "recorded_at": fix.updated_at,
+                            "latitude": fix.latitude,
+                            "longitude": fix.longitude,
+                            "speed_kmh": fix.speed_kmh,
+                        }
+                        for run_id, fix in history
+                    ],
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for run_id, fix in batch.items():
+                    self._dirty.setdefault(run_id, fix)
+                self._flushing = {}
+                self._history[:0] = history
+            raise
+
+        with self._lock:
+            self._flushing = {}
+        return len(batch)
+
+    async def run_periodic_flush(self, db_executor, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await db_executor.run(self.flush)
+            except Exception:
+                logger.exception("Failed to flush buffered run positions")
+
+
+position_buffer = PositionBuffer(topic="position_buffer")
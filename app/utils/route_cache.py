@@ -0,0 +1,115 @@
+import hashlib
+import secrets
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime
+
+from fastapi import Request
+
+from app.utils.invalidation import invalidations
+
+
+# Run id -> (last_latitude, last_longitude, last_updated).
+RunPositions = dict[int, tuple[float | None, float | None, datetime | None]]
+
+
+@dataclass(frozen=True, slots=True)
+class CachedRoute:
+    route_id: int
+    version: int
+    etag: str | None
+    body: bytes
+    # Run positions as serialized in ``body``.
+    positions: RunPositions
+
+
+class RouteResponseCache:
+    """Per-process serialized ``RouteOut`` bodies keyed by a per-route version.
+
+    Route, run, stop and school write paths ``bump`` the affected routes.
+    GPS traffic does not: the runs' positions are not part of the version,
+    and callers overlay the current ones onto ``body`` when serving it.
+    ETags embed a random per-process epoch plus the version, so a tag issued
+    by another worker or before a restart never matches and is answered with
+    a fresh body instead of a 304. With a ``topic``, bumps are applied in
+    every worker through the invalidation bus.
+    """
+
+    def __init__(self, topic: str | None = None) -> None:
+        self.epoch = secrets.token_hex(4)
+        self._generation = 0
+        self._versions: dict[int, int] = {}
+        self._entries: dict[int, CachedRoute] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.topic = topic
+        if topic:
+            invalidations.register(topic, self._bump_local)
+
+    def version(self, route_id: int) -> int:
+        return self._versions.get(route_id, 0)
+
+    def etag(self, route_id: int) -> str:
+        return f'"{self.epoch}-{self._generation}-{route_id}-{self.version(route_id)}"'
+
+    def get(self, route_id: int) -> CachedRoute | None:
+        entry = self._entries.get(route_id)
+        if entry is None or entry.etag != self.etag(route_id):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def stamp(self, route_id: int) -> str:
+        """Capture the route's state before loading it from the database."""
+        return self.etag(route_id)
+
+    def put(self, route_id: int, stamp: str, body: bytes, positions: RunPositions) -> CachedRoute:
+        """Store ``body``, loaded after ``stamp`` was taken.
+
+        Returns the entry either way. It is only kept, and only carries an
+        ETag, if no write could have changed the route in the meantime.
+        """
+        with self._lock:
+            if stamp != self.etag(route_id):
+                return CachedRoute(route_id, self.version(route_id), None, body, positions)
+            entry = CachedRoute(route_id, self.version(route_id), stamp, body, positions)
+            self._entries[route_id] = entry
+        return entry
+
+    def bump(self, *route_ids: int | None) -> None:
+        route_ids = tuple(route_id for route_id in route_ids if route_id is not None)
+        if self.topic:
+            invalidations.publish(self.topic, *route_ids)
+        else:
+            self._bump_local(*route_ids)
+
+    def _bump_local(self, *route_ids: int) -> None:
+        with self._lock:
+            for route_id in route_ids:
+                self._versions[route_id] = self._versions.get(route_id, 0) + 1
+                self._entries.pop(route_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+route_cache = RouteResponseCache(topic="route_cache")
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def combined_etag(etags: Iterable[str], *extra: str) -> str:
+    digest = hashlib.sha1("|".join([*etags, *extra]).encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
@@ -0,0 +1,130 @@
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+
+from app.models import Run
+from app.utils.gps import RouteProgressCursor, cumulative_path_meters, get_ordered_run_stops
+from app.utils.invalidation import invalidations
+
+
+@dataclass(frozen=True, slots=True)
+class RunGeometry:
+    """Immutable, pre-sorted stop data for one run, read by the GPS hot path."""
+
+    run_id: int
+    driver_id: int
+    status: str
+    stop_ids: tuple[int, ...]
+    names: tuple[str, ...]
+    sequences: np.ndarray
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    eta_offsets: np.ndarray
+    cumulative_m: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_run(cls, run: Run) -> "RunGeometry":
+        stops = get_ordered_run_stops(run)
+        latitudes = _frozen_array([stop.latitude for stop in stops], np.float64)
+        longitudes = _frozen_array([stop.longitude for stop in stops], np.float64)
+        cumulative_m = cumulative_path_meters(latitudes, longitudes)
+        cumulative_m.flags.writeable = False
+        return cls(
+            run_id=run.id,
+            driver_id=run.driver_id,
+            status=run.status,
+            stop_ids=tuple(stop.id for stop in stops),
+            names=tuple(stop.name for stop in stops),
+            sequences=_frozen_array([stop.sequence for stop in stops], np.int64),
+            latitudes=latitudes,
+            longitudes=longitudes,
+            eta_offsets=_frozen_array([stop.eta_offset_min or 0 for stop in stops], np.int64),
+            cumulative_m=cumulative_m,
+        )
+
+
+def _frozen_array(values: list, dtype) -> np.ndarray:
+    arr = np.array(values, dtype=dtype)
+    arr.flags.writeable = False
+    return arr
+
+
+class RunGeometryCache:
+    """Per-process map of run id to ``RunGeometry`` and its progress cursor.
+
+    Writers call ``invalidate`` after committing stop or run changes. Each
+    invalidation bumps a generation counter so that a load which started
+    before the change cannot store stale geometry afterwards. Storing new
+    geometry for a run resets its cursor. With a ``topic``, invalidations
+    are applied in every worker.
+    """
+
+    def __init__(self, topic: str | None = None) -> None:
+        self._items: dict[int, RunGeometry] = {}
+        self._cursors: dict[int, RouteProgressCursor] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.topic = topic
+        if topic:
+            invalidations.register(topic, self._invalidate_local)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, run_id: int) -> RunGeometry | None:
+        return self._items.get(run_id)
+
+    def cursor(self, run_id: int) -> RouteProgressCursor:
+        cursor = self._cursors.get(run_id)
+        if cursor is None:
+            cursor = self._cursors.setdefault(run_id, RouteProgressCursor())
+        return cursor
+
+    def put(self, geometry: RunGeometry, generation: int | None = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._items[geometry.run_id] = geometry
+            self._cursors.pop(geometry.run_id, None)
+
+    def invalidate(self, *run_ids: int | None) -> None:
+        run_ids = tuple(run_id for run_id in run_ids if run_id is not None)
+        if self.topic:
+            invalidations.publish(self.topic, *run_ids)
+        else:
+            self._invalidate_local(*run_ids)
+
+    def _invalidate_local(self, *run_ids: int) -> None:
+        with self._lock:
+            self._generation += 1
+            for run_id in run_ids:
+                self._items.pop(run_id, None)
+                self._cursors.pop(run_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._items.clear()
+            self._cursors.clear()
+
+
+run_geometry_cache = RunGeometryCache(topic="run_geometry")
+
+
+def load_run_geometry(db: Session, run_id: int) -> RunGeometry | None:
+    generation = run_geometry_cache.generation
+    run = db.get(Run, run_id, options=[selectinload(Run.stops)])
+    if not run:
+        return None
+    geometry = RunGeometry.from_run(run)
+    run_geometry_cache.put(geometry, generation)
+    return geometry
@@ -0,0 +1,97 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+
+# Leaf frames of a thread parked waiting for work: the event loop in its
+# selector, threadpool workers on their queues.
+_IDLE_LEAVES = {("selectors.py", "select"), ("threading.py", "wait"), ("queue.py", "get")}
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+
+@dataclass(frozen=True, slots=True)
+class StackProfile:
+    stacks: Counter
+    samples: int
+    seconds: float
+    interval: float
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format: ``thread;outer;...;leaf count`` per line."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class SamplingProfiler:
+    """Time-bounded wall-clock stack sampler for every thread in the process.
+
+    While ``run`` is active, the calling thread wakes every ``interval``
+    seconds and reads ``sys._current_frames()``, which covers the event loop,
+    the AnyIO threadpool and the DB executor alike. Nothing is installed
+    between runs, so an idle profiler costs nothing. A polling thread is used
+    rather than a ``SIGPROF`` timer because signal handlers only run on the
+    main thread and timers are not available on Windows.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._labels: dict = {}
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def run(self, seconds: float, interval: float, include_idle: bool = False) -> StackProfile:
+        """Sample for ``seconds`` and return the aggregated stacks; blocks the caller."""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already running")
+        try:
+            return self._sample(seconds, interval, include_idle)
+        finally:
+            self._labels.clear()
+            self._lock.release()
+
+    def _sample(self, seconds: float, interval: float, include_idle: bool) -> StackProfile:
+        own = threading.get_ident()
+        stacks: Counter = Counter()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+        next_sample = started
+        while (now := time.perf_counter()) < deadline:
+            if now < next_sample:
+                time.sleep(next_sample - now)
+            next_sample += interval
+            if next_sample < now:
+                # Skip missed ticks rather than sampling back to back to catch up.
+                next_sample = now + interval
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            samples += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                code = frame.f_code
+                if not include_idle and (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}").replace(" ", "_"))
+                stacks[";".join(reversed(labels))] += 1
+        return StackProfile(stacks=stacks, samples=samples, seconds=time.perf_counter() - started, interval=interval)
+
+
+sampling_profiler = SamplingProfiler()
@@ -1,7 +1,7 @@
 ﻿from sqlalchemy.orm import Session
 
 from app.models import Driver
-from app.utils.auth import hash_password
+from app.utils.passwords import hash_password
 
 
 def seed_default_driver(db: Session) -> None:
@@ -0,0 +1,162 @@
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-SQL-Profile"
+
+
+@dataclass(slots=True)
+class StatementStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class RequestProfile:
+    """Statements run while handling one request or websocket message."""
+
+    label: str
+    statements: dict[str, StatementStats] = field(default_factory=dict)
+    total: int = 0
+    seconds: float = 0.0
+
+    def record(self, statement: str, seconds: float) -> None:
+        stats = self.statements.get(statement)
+        if stats is None:
+            stats = self.statements[statement] = StatementStats()
+        stats.count += 1
+        stats.seconds += seconds
+        self.total += 1
+        self.seconds += seconds
+
+    def repeated(self, threshold: int) -> list[tuple[str, StatementStats]]:
+        """Identical statement texts run ``threshold`` or more times, most frequent first."""
+        found = [(statement, stats) for statement, stats in self.statements.items() if stats.count >= threshold]
+        return sorted(found, key=lambda item: item[1].count, reverse=True)
+
+    def summary(self) -> str:
+        max_repeat = max((stats.count for stats in self.statements.values()), default=0)
+        return f"statements={self.total}; distinct={len(self.statements)}; max_repeat={max_repeat}; time_ms={self.seconds * 1000:.2f}"
+
+
+_active: ContextVar[RequestProfile | None] = ContextVar("sql_profile", default=None)
+
+
+def _one_line(statement: str, limit: int = 300) -> str:
+    text = " ".join(statement.split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+class SQLProfiler:
+    """Opt-in statement counting, N+1 detection and slow-query logging.
+
+    ``instrument`` attaches cursor events to an engine. Every statement slower
+    than ``slow_ms`` is logged with its parameters and, on SQLite, its
+    ``EXPLAIN QUERY PLAN``. Inside ``profile`` (one HTTP request or one
+    websocket message) statements are also tallied by text, and a statement
+    run ``repeat_threshold`` or more times is reported as a likely N+1.
+    """
+
+    def __init__(self, slow_ms: float | None = None, repeat_threshold: int | None = None) -> None:
+        self.slow_ms = settings.sql_slow_query_ms if slow_ms is None else slow_ms
+        self.repeat_threshold = repeat_threshold or settings.sql_repeat_threshold
+        self.enabled = False
+
+    def instrument(self, engine: Engine) -> None:
+        self.enabled = True
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        context._sql_profile_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        seconds = time.perf_counter() - context._sql_profile_started
+        profile = _active.get()
+        if profile is not None:
+            profile.record(statement, seconds)
+        if seconds * 1000 >= self.slow_ms:
+            plan = None if executemany or conn.dialect.name != "sqlite" else self._explain(conn, statement, parameters)
+            logger.warning(
+                "Slow query %.1f ms%s: %s | params=%r | plan=%s",
+                seconds * 1000,
+                f" in {profile.label}" if profile else "",
+                _one_line(statement),
+                parameters if not executemany else f"<{len(parameters)} rows>",
+                plan or "n/a",
+            )
+
+    @staticmethod
+    def _explain(conn, statement: str, parameters) -> str | None:
+        try:
+            rows = conn.connection.driver_connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        except Exception:
+            return None
+        return "; ".join(row[-1] for row in rows)
+
+    @contextmanager
+    def profile(self, label: str) -> Iterator[RequestProfile | None]:
+        if not self.enabled:
+            yield None
+            return
+        profile = RequestProfile(label)
+        token = _active.set(profile)
+        try:
+            yield profile
+        finally:
+            _active.reset(token)
+            self.report(profile)
+
+    def report(self, profile: RequestProfile) -> None:
+        for statement, stats in profile.repeated(self.repeat_threshold):
+            logger.warning(
+                "Possible N+1 in %s: %d x %.1f ms total: %s",
+                profile.label,
+                stats.count,
+                stats.seconds * 1000,
+                _one_line(statement),
+            )
+        logger.debug("SQL for %s: %s", profile.label, profile.summary())
+
+
+sql_profiler = SQLProfiler()
+
+
+class SQLProfileMiddleware:
+    """Profiles each HTTP request; in debug mode adds an ``X-SQL-Profile`` summary header.
+
+    The header carries the statements run before the response started, which
+    for streaming responses excludes the body.
+    """
+
+    def __init__(self, app, profiler: SQLProfiler = sql_profiler, header: bool = False) -> None:
+        self.app = app
+        self.profiler = profiler
+        self.header = header
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with self.profiler.profile(f"{scope['method']} {scope['path']}") as profile:
+
+            async def send_wrapper(message) -> None:
+                if self.header and profile is not None and message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((PROFILE_HEADER.lower().encode("latin-1"), profile.summary().encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,100 @@
+"""Compact binary encoding of live run updates.
+
+Clients opt in per connection with ``?protocol=binary`` on the GPS and watch
+sockets; everything else keeps receiving JSON text frames. Binary updates are
+little-endian ``struct`` frames sent as websocket binary messages:
+
+- key frame:   ``B type=1, I run_id, I seq`` followed by every field
+- delta frame: ``B type=2, I run_id, I seq, H mask`` followed by the fields
+  whose bit is set in ``mask``; it applies on top of frame ``seq - 1``
+
+Fields, in bit order: timestamp (epoch seconds, f64), latitude (f64),
+longitude (f64), current stop index (i16, -1 for none), next stop index (i16),
+progress percent x100 (u16), eta minutes (u16), distance to next stop in
+meters (f32), alert flag (u8). Stop indices refer to the run's stops ordered
+by sequence; the alert text is ``"Approaching <next stop name>"``. Error
+replies are always JSON text frames.
+"""
+import struct
+from datetime import datetime
+
+PROTOCOLS = ("json", "binary")
+
+KEY_FRAME = 1
+DELTA_FRAME = 2
+
+_HEADER = struct.Struct("<BII")
+_DELTA_HEADER = struct.Struct("<BIIH")
+FIELDS: tuple[tuple[str, str], ...] = (
+    ("timestamp", "d"),
+    ("latitude", "d"),
+    ("longitude", "d"),
+    ("current_stop_index", "h"),
+    ("next_stop_index", "h"),
+    ("progress_centi", "H"),
+    ("eta_minutes", "H"),
+    ("distance_to_next_m", "f"),
+    ("alert", "B"),
+)
+_FIELD_STRUCTS = tuple(struct.Struct("<" + fmt) for _, fmt in FIELDS)
+_BODY = struct.Struct("<" + "".join(fmt for _, fmt in FIELDS))
+
+
+def frame_values(update: dict) -> tuple:
+    """Map a JSON run update onto the binary field tuple."""
+    return (
+        datetime.fromisoformat(update["timestamp"]).timestamp(),
+        update["latitude"],
+        update["longitude"],
+        _stop_index(update.get("current_stop_index")),
+        _stop_index(update.get("next_stop_index")),
+        min(10_000, max(0, round(update["progress_percent"] * 100))),
+        min(0xFFFF, max(0, update["eta_minutes"])),
+        update["distance_to_next_m"],
+        1 if update.get("alert") else 0,
+    )
+
+
+def _stop_index(value: int | None) -> int:
+    return -1 if value is None else value
+
+
+def encode_key_frame(run_id: int, seq: int, values: tuple) -> bytes:
+    return _HEADER.pack(KEY_FRAME, run_id, seq) + _BODY.pack(*values)
+
+
+def encode_delta_frame(run_id: int, seq: int, values: tuple, previous: tuple) -> bytes:
+    mask = 0
+    parts = []
+    for bit, (value, old, field) in enumerate(zip(values, previous, _FIELD_STRUCTS)):
+        if value != old:
+            mask |= 1 << bit
+            parts.append(field.pack(value))
+    return _DELTA_HEADER.pack(DELTA_FRAME, run_id, seq, mask) + b"".join(parts)
+
+
+def decode_frame(data: bytes, state: dict[int, tuple[int, tuple]]) -> dict:
+    """Decode a frame, applying deltas to ``state`` (run_id -> (seq, values))."""
+    frame_type, run_id, seq = _HEADER.unpack_from(data)
+    if frame_type == KEY_FRAME:
+        values = _BODY.unpack_from(data, _HEADER.size)
+    elif frame_type == DELTA_FRAME:
+        base_seq, previous = state.get(run_id, (None, None))
+        if previous is None or base_seq != seq - 1:
+            raise ValueError(f"Delta frame {seq} for run {run_id} has no base frame")
+        (mask,) = _DELTA_HEADER.unpack_from(data)[3:]
+        offset = _DELTA_HEADER.size
+        values = list(previous)
+        for bit, field in enumerate(_FIELD_STRUCTS):
+            if mask & (1 << bit):
+                (values[bit],) = field.unpack_from(data, offset)
+                offset += field.size
+        values = tuple(values)
+    else:
+        raise ValueError(f"Unknown frame type {frame_type}")
+
+    state[run_id] = (seq, values)
+    decoded = dict(zip((name for name, _ in FIELDS), values))
+    decoded["run_id"] = run_id
+    decoded["seq"] = seq
+    return decoded
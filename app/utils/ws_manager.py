@@ -1,29 +1,292 @@
-﻿from collections import defaultdict
+﻿import asyncio
+import json
+import logging
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from itertools import chain
 
 from fastapi import WebSocket
 
+from app.config import settings
+from app.utils.broadcast import BroadcastBackend, InProcessBackend
+from app.utils.metrics import broadcast_fanout, gps_broadcasts, ws_deliveries
+from app.utils.wire import encode_delta_frame, encode_key_frame, frame_values
+
+
+logger = logging.getLogger(__name__)
+
+SEND_POLICIES = ("drop_oldest", "keep_latest")
+
+
+def encode_message(payload: dict) -> str:
+    # Same encoding as Starlette's WebSocket.send_json.
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+class Subscriber:
+    """One websocket with its own bounded outbound queue and drain task.
+
+    When the queue is full the oldest frame is dropped (``drop_oldest``), or
+    only the newest frame is ever kept (``keep_latest``). A send that does not
+    complete within ``send_timeout`` marks the subscriber as stuck.
+
+    Binary subscribers track the last frame sequence queued per run so they
+    can be sent delta frames; when their queue overflows the queue is cleared
+    instead and the next frame for every run is a key frame.
+    """
+
+    def __init__(
+        self, websocket: WebSocket, queue_size: int, policy: str, send_timeout: float, binary: bool = False
+    ) -> None:
+        if policy not in SEND_POLICIES:
+            raise ValueError(f"Unknown websocket send policy: {policy}")
+        self.websocket = websocket
+        self.send_timeout = send_timeout
+        self.queue: deque[str] = deque(maxlen=1 if policy == "keep_latest" else queue_size)
+        self.dropped = 0
+        self.run_ids: tuple[int, ...] | None = None
+        self.binary = binary
+        self.binary_seq: dict[int, int] = {}
+        self._ready = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+    @property
+    def depth(self) -> int:
+        return len(self.queue)
+
+    @property
+    def full(self) -> bool:
+        return len(self.queue) == self.queue.maxlen
+
+    def push(self, frame: str | bytes) -> None:
+        if self.full:
+            self.dropped += 1
+        self.queue.append(frame)
+        self._ready.set()
+
+    def push_binary(self, run_id: int, seq: int, key_frame: bytes, delta_frame: bytes | None) -> None:
+        if self.full:
+            self.dropped += len(self.queue)
+            self.queue.clear()
+            self.binary_seq.clear()
+        if delta_frame is not None and self.binary_seq.get(run_id) == seq - 1:
+            self.push(delta_frame)
+        else:
+            self.push(key_frame)
+        self.binary_seq[run_id] = seq
+
+    async def drain(self) -> None:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self.queue:
+                frame = self.queue.popleft()
+                if isinstance(frame, bytes):
+                    send = self.websocket.send_bytes(frame)
+                else:
+                    send = self.websocket.send_text(frame)
+                await asyncio.wait_for(send, timeout=self.send_timeout)
+
+
+@dataclass(frozen=True, slots=True)
+class _RunFrames:
+    seq: int
+    values: tuple
+    text: str
+    key: bytes
+    delta: bytes | None
+
 
 class ConnectionManager:
-    def __init__(self) -> None:
-        self.connections: dict[int, set[WebSocket]] = defaultdict(set)
+    """Per-run websocket subscribers plus the latest update seen for each run.
 
-    async def connect(self, run_id: int, websocket: WebSocket) -> None:
-        await websocket.accept()
-        self.connections[run_id].add(websocket)
+    Drivers are attached to a single run with ``connect``. Watchers attach to
+    a set of runs, or to every run when ``run_ids`` is ``None``, with
+    ``subscribe``; they receive the cached latest update of each run on
+    connect. The cache is fed from backend deliveries, so it also reflects
+    fixes ingested by other workers. Binary key and delta frames are built
+    at most once per delivery, and only when a binary subscriber needs them.
+    Cached state for a run is dropped by ``forget`` when the run ends, and
+    by ``snapshot`` once it is older than ``ws_watch_active_seconds``.
+    """
+
+    def __init__(
+        self,
+        queue_size: int | None = None,
+        policy: str | None = None,
+        send_timeout: float | None = None,
+        backend: BroadcastBackend | None = None,
+    ) -> None:
+        self.backend = backend or InProcessBackend()
+        self.backend.bind(self._deliver)
+        self.queue_size = queue_size or settings.ws_send_queue_size
+        self.policy = policy or settings.ws_send_policy
+        self.send_timeout = send_timeout or settings.ws_send_timeout_seconds
+        self.connections: dict[int, dict[WebSocket, Subscriber]] = defaultdict(dict)
+        self.watchers: dict[WebSocket, Subscriber] = {}
+        self.latest: dict[int, tuple[str, float]] = {}
+        self._frames: dict[int, _RunFrames] = {}
+        self.evicted = 0
+
+    async def start(self) -> None:
+        await self.backend.start()
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+    async def connect(self, run_id: int, websocket: WebSocket, binary: bool = False) -> None:
+        await self.subscribe(websocket, [run_id], snapshot=False, binary=binary)
 
     def disconnect(self, run_id: int, websocket: WebSocket) -> None:
-        if run_id in self.connections:
-            self.connections[run_id].discard(websocket)
-            if not self.connections[run_id]:
-                self.connections.pop(run_id, None)
+        subscriber = self.connections.get(run_id, {}).get(websocket)
+        if subscriber:
+            self._remove(subscriber)
+
+    async def subscribe(
+        self, websocket: WebSocket, run_ids: list[int] | None, snapshot: bool = True, binary: bool = False
+    ) -> Subscriber:
+        await websocket.accept()
+        subscriber = Subscriber(websocket, self.queue_size, self.policy, self.send_timeout, binary=binary)
+        subscriber.run_ids = tuple(run_ids) if run_ids is not None else None
+        if subscriber.run_ids is None:
+            self.watchers[websocket] = subscriber
+        else:
+            for run_id in subscriber.run_ids:
+                self.connections[run_id][websocket] = subscriber
+        if snapshot:
+            for run_id, text in self.snapshot(run_ids):
+                if binary:
+                    self._push_binary(subscriber, run_id, text)
+                else:
+                    subscriber.push(text)
+        subscriber.task = asyncio.create_task(self._drain(subscriber))
+        return subscriber
+
+    def unsubscribe(self, websocket: WebSocket) -> None:
+        subscriber = self.watchers.get(websocket)
+        if subscriber is None:
+            subscriber = next(
+                (subs[websocket] for subs in self.connections.values() if websocket in subs),
+                None,
+            )
+        if subscriber:
+            self._remove(subscriber)
+
+    def snapshot(self, run_ids: list[int] | None = None) -> list[tuple[int, str]]:
+        cutoff = time.monotonic() - settings.ws_watch_active_seconds
+        if run_ids is None:
+            run_ids = list(self.latest)
+        snapshot = []
+        for run_id in run_ids:
+            entry = self.latest.get(run_id)
+            if entry is None:
+                continue
+            if entry[1] >= cutoff:
+                snapshot.append((run_id, entry[0]))
+            else:
+                self.forget(run_id)
+        return snapshot
+
+    def forget(self, *run_ids: int) -> None:
+        """Drop the cached latest update and binary frames of ended runs."""
+        for run_id in run_ids:
+            self.latest.pop(run_id, None)
+            self._frames.pop(run_id, None)
+
+    async def send(self, run_id: int, websocket: WebSocket, payload: dict) -> None:
+        subscriber = self.connections.get(run_id, {}).get(websocket)
+        if subscriber:
+            subscriber.push(encode_message(payload))
 
     async def broadcast(self, run_id: int, payload: dict) -> None:
-        dead: list[WebSocket] = []
-        for ws in self.connections.get(run_id, set()):
+        gps_broadcasts.inc()
+        await self.backend.publish(run_id, encode_message(payload))
+
+    def _deliver(self, run_id: int, text: str) -> None:
+        started = time.perf_counter()
+        self.latest[run_id] = (text, time.monotonic())
+        delivered = 0
+        for subscriber in chain(self.connections.get(run_id, {}).values(), self.watchers.values()):
+            if subscriber.binary:
+                self._push_binary(subscriber, run_id, text)
+            else:
+                subscriber.push(text)
+            delivered += 1
+        ws_deliveries.inc(amount=delivered)
+        broadcast_fanout.observe(time.perf_counter() - started)
+
+    def _push_binary(self, subscriber: Subscriber, run_id: int, text: str) -> None:
+        frames = self._frames.get(run_id)
+        if frames is None or frames.text is not text:
             try:
-                await ws.send_json(payload)
-            except Exception:
-                dead.append(ws)
+                values = frame_values(json.loads(text))
+            except (KeyError, TypeError, ValueError):
+                subscriber.push(text)
+                return
+            seq = frames.seq + 1 if frames else 1
+            frames = _RunFrames(
+                seq=seq,
+                values=values,
+                text=text,
+                key=encode_key_frame(run_id, seq, values),
+                delta=encode_delta_frame(run_id, seq, values, frames.values) if frames else None,
+            )
+            self._frames[run_id] = frames
+        subscriber.push_binary(run_id, frames.seq, frames.key, frames.delta)
 
-        for ws in dead:
-            self.disconnect(run_id, ws)
+    def _remove(self, subscriber: Subscriber) -> None:
+        websocket = subscriber.websocket
+        if subscriber.run_ids is None:
+            self.watchers.pop(websocket, None)
+        else:
+            for run_id in subscriber.run_ids:
+                subscribers = self.connections.get(run_id)
+                if subscribers is None:
+                    continue
+                subscribers.pop(websocket, None)
+                if not subscribers:
+                    self.connections.pop(run_id, None)
+        if subscriber.task and subscriber.task is not asyncio.current_task():
+            subscriber.task.cancel()
+
+    def stats(self) -> dict:
+        runs = {}
+        for run_id, subscribers in self.connections.items():
+            depths = [subscriber.depth for subscriber in subscribers.values()]
+            runs[run_id] = {
+                "subscribers": len(subscribers),
+                "queued": sum(depths),
+                "max_queue_depth": max(depths, default=0),
+                "dropped": sum(subscriber.dropped for subscriber in subscribers.values()),
+            }
+        watcher_depths = [subscriber.depth for subscriber in self.watchers.values()]
+        return {
+            "backend": self.backend.name,
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            "evicted": self.evicted,
+            "all_runs_watchers": {
+                "subscribers": len(self.watchers),
+                "queued": sum(watcher_depths),
+                "max_queue_depth": max(watcher_depths, default=0),
+                "dropped": sum(subscriber.dropped for subscriber in self.watchers.values()),
+            },
+            "runs": runs,
+        }
+
+    async def _drain(self, subscriber: Subscriber) -> None:
+        try:
+            await subscriber.drain()
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.evicted += 1
+            logger.warning("Evicting stuck websocket subscriber for runs %s", subscriber.run_ids or "all")
+            self._remove(subscriber)
+            try:
+                await asyncio.wait_for(subscriber.websocket.close(code=1013), timeout=subscriber.send_timeout)
+            except Exception:
+                pass
+        except Exception:
+            self._remove(subscriber)
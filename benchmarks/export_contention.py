@@ -0,0 +1,73 @@
+"""Exports vs. writers: does a half-read export block commits?
+
+Seeds runs, starts a runs export and reads only the first few chunks, as a
+slow client would, then commits an ``UPDATE runs`` (the same write a run
+start/finish or position flush makes) while the stream is still open, and
+finally drains the export. Reports the commit latency and exits non-zero if
+the commit failed with ``database is locked`` or the export lost rows. Runs
+under whatever ``DATABASE_PROFILE`` is set; the ``default`` rollback journal
+is the one an open read transaction would block.
+
+Usage: python -m benchmarks.export_contention [--runs 5000] [--chunk-size 500] [--read-chunks 2]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix="sbt-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+
+from sqlalchemy import insert, select, update  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.config import settings  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Driver, Route, Run  # noqa: E402
+from app.utils.export import iter_export  # noqa: E402
+
+
+def build(runs: int) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        driver = Driver(name="Bench", email="bench@example.com", password_hash="x")
+        db.add(driver)
+        db.flush()
+        route_id = db.scalar(insert(Route).returning(Route.id), {"name": "Route", "code": "R0001", "driver_id": driver.id})
+        db.execute(insert(Run), [{"route_id": route_id, "driver_id": driver.id, "status": "completed"}] * runs)
+        db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--read-chunks", type=int, default=2, help="chunks the slow client reads before the write")
+    args = parser.parse_args()
+
+    build(args.runs)
+    stream = iter_export(select(*Run.__table__.columns), (Run.id,), "ndjson", args.chunk_size)
+    lines = sum(next(stream).count("\n") for _ in range(args.read_chunks))
+
+    started = time.perf_counter()
+    try:
+        with SessionLocal() as db:
+            db.execute(update(Run).where(Run.id == 1).values(status="active"))
+            db.commit()
+        error = None
+    except OperationalError as exc:
+        error = exc.orig
+    elapsed = (time.perf_counter() - started) * 1000
+    lines += sum(chunk.count("\n") for chunk in stream)
+
+    print(f"profile {settings.database_profile}, {args.runs} runs, write after {args.read_chunks} chunks of {args.chunk_size}")
+    print(f"write: {'failed (' + str(error) + ')' if error else 'committed'} in {elapsed:.1f} ms; exported {lines} rows")
+    if error or lines != args.runs:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
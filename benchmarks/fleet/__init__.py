@@ -0,0 +1,5 @@
+"""Fleet-scale load test: N drivers streaming GPS, M viewers, dashboard pollers.
+
+Run ``python -m benchmarks.fleet --help``. See ``__main__`` for the report
+format and ``compare`` for diffing two saved result files.
+"""
@@ -0,0 +1,191 @@
+"""Fleet-scale GPS load test against one app worker.
+
+For each fleet size, inserts N drivers with an active run over a synthetic
+stop sequence, signs them in, and has each stream ``--fixes`` fixes over
+``/ws/gps/{run_id}`` while ``--viewers`` clients watch every run on
+``/ws/watch`` and ``--pollers`` clients load the dashboard, the active run
+list and a route. Reports send throughput, p50/p95/p99 fix-to-broadcast
+latency (as seen by viewers; driver echoes when there are none), REST
+latency, position rows written per second and server memory.
+
+By default the app runs in this process under uvicorn on a background
+thread. To load a separately started ``uvicorn app.main:app``, pass
+``--url`` (and ``--server-pid`` for memory), with ``DATABASE_URL`` set to
+the server's database so the fleet can be inserted into it.
+
+``--output`` saves the results as JSON; ``python -m benchmarks.fleet.compare``
+diffs two such files.
+
+Usage: python -m benchmarks.fleet [--buses 10 50 100] [--viewers 10] [--fixes 30] [--output fleet.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+_tmpdir = tempfile.mkdtemp(prefix="sbt-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+# Measure every fix; the interval filter would drop fixes that jitter below it.
+os.environ.setdefault("GPS_MIN_INTERVAL_SECONDS", "0")
+
+import httpx  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from benchmarks.fleet.clients import Recorder, drive, login_all, poll, summarize, watch  # noqa: E402
+from benchmarks.fleet.scenario import build_fleet, position_count  # noqa: E402
+from benchmarks.fleet.server import InProcessServer, process_memory  # noqa: E402
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def ws_stats(base_url: str, cookie: str) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, cookies={"session": cookie}) as http:
+        response = await http.get("/ws/stats")
+        return response.json() if response.status_code == 200 else {}
+
+
+async def run_fleet(base_url: str, buses: int, args, server_pid: int | None) -> dict:
+    fleet = build_fleet(buses, stops=args.stops)
+    cookies = await login_all(base_url, [bus.driver_email for bus in fleet])
+    recorder = Recorder()
+    memory_before = process_memory(server_pid)
+    positions_before = position_count()
+
+    ready = [asyncio.Event() for _ in range(args.viewers)]
+    viewers = [asyncio.create_task(watch(base_url, cookies[0], recorder, event)) for event in ready]
+    await asyncio.wait_for(asyncio.gather(*(event.wait() for event in ready)), timeout=30)
+    route_ids = [bus.route_id for bus in fleet]
+    pollers = [
+        asyncio.create_task(poll(base_url, cookies[0], route_ids, args.poll_interval, recorder))
+        for _ in range(args.pollers)
+    ]
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(drive(base_url, cookie, bus, args.fixes, args.interval, recorder) for bus, cookie in zip(fleet, cookies))
+    )
+    elapsed = time.perf_counter() - started
+    # Let in-flight broadcasts land before closing the viewers.
+    await asyncio.sleep(args.settle)
+    for task in pollers + viewers:
+        task.cancel()
+    await asyncio.gather(*pollers, *viewers, return_exceptions=True)
+    memory_after = process_memory(server_pid)
+    stats = await ws_stats(base_url, cookies[0])
+
+    # Buffered positions reach the database on the next periodic flush.
+    await asyncio.sleep(args.flush_wait)
+    positions = position_count() - positions_before
+
+    watchers = stats.get("all_runs_watchers", {})
+    latencies = recorder.fix_to_broadcast if args.viewers else recorder.fix_to_echo
+    return {
+        "buses": buses,
+        "viewers": args.viewers,
+        "pollers": args.pollers,
+        "duration_s": round(elapsed, 2),
+        "fixes_sent": recorder.fixes_sent,
+        "fixes_per_s": round(recorder.fixes_sent / elapsed, 1),
+        "fixes_undelivered": recorder.fixes_sent - len(recorder.delivered),
+        "driver_errors": recorder.driver_errors,
+        "broadcasts_received": recorder.broadcasts_received,
+        "broadcasts_per_s": round(recorder.broadcasts_received / elapsed, 1),
+        "fix_to_broadcast": summarize(latencies),
+        "rest": {name: {**summarize(values), "errors": recorder.rest_errors[name]} for name, values in recorder.rest.items()},
+        "db_positions_written": positions,
+        "db_positions_per_s": round(positions / elapsed, 1),
+        "ws_dropped": watchers.get("dropped"),
+        "ws_evicted": stats.get("evicted"),
+        "memory_before": memory_before,
+        "memory_after": memory_after,
+    }
+
+
+def print_table(results: list[dict]) -> None:
+    print(
+        f"{'buses':>6}{'fixes/s':>9}{'bcast/s':>9}{'p50':>8}{'p95':>8}{'p99':>8}"
+        f"{'dash p95':>10}{'rows/s':>8}{'undeliv':>9}{'rss MiB':>9}"
+    )
+    for r in results:
+        latency = r["fix_to_broadcast"]
+        dashboard = r["rest"].get("dashboard", {})
+        rss = (r["memory_after"] or {}).get("rss_mb", "-")
+        print(
+            f"{r['buses']:>6}{r['fixes_per_s']:>9}{r['broadcasts_per_s']:>9}{latency['p50_ms']:>8}"
+            f"{latency['p95_ms']:>8}{latency['p99_ms']:>8}{dashboard.get('p95_ms', '-'):>10}"
+            f"{r['db_positions_per_s']:>8}{r['fixes_undelivered']:>9}{rss:>9}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buses", type=int, nargs="+", default=[10, 50, 100])
+    parser.add_argument("--viewers", type=int, default=10)
+    parser.add_argument("--pollers", type=int, default=2)
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between poller rounds")
+    parser.add_argument("--fixes", type=int, default=30, help="fixes per bus")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between fixes per bus")
+    parser.add_argument("--stops", type=int, default=20, help="stops per run")
+    parser.add_argument("--settle", type=float, default=1.0, help="seconds to wait for broadcasts after the last fix")
+    parser.add_argument(
+        "--flush-wait",
+        type=float,
+        default=settings.position_flush_interval_seconds + 1,
+        help="seconds to wait for the position flush before counting rows",
+    )
+    parser.add_argument("--url", help="base URL of a running server; default runs the app in-process")
+    parser.add_argument("--server-pid", type=int, help="PID of the --url server, for memory figures")
+    parser.add_argument("--label", help="free-form label stored with the results")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        base_url, server_pid = args.url.rstrip("/"), args.server_pid
+    else:
+        server = InProcessServer()
+        server.start()
+        base_url, server_pid = server.url, server.pid
+
+    try:
+        results = [asyncio.run(run_fleet(base_url, buses, args, server_pid)) for buses in args.buses]
+    finally:
+        if server:
+            server.stop()
+
+    print_table(results)
+    if args.output:
+        report = {
+            "benchmark": "fleet",
+            "label": args.label,
+            "revision": git_revision(),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": "url" if args.url else "in-process",
+            "database_profile": settings.database_profile,
+            "config": {
+                key: getattr(args, key)
+                for key in ("viewers", "pollers", "poll_interval", "fixes", "interval", "stops")
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+        print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
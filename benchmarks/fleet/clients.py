@@ -0,0 +1,149 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+from websockets.asyncio.client import connect
+
+from benchmarks.fleet.scenario import PASSWORD, Bus
+
+
+SESSION_COOKIE = "session"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    return {
+        "count": len(values),
+        "p50_ms": round(statistics.median(values), 2) if values else 0.0,
+        "p95_ms": round(percentile(values, 95), 2),
+        "p99_ms": round(percentile(values, 99), 2),
+        "max_ms": round(max(values, default=0.0), 2),
+    }
+
+
+class Recorder:
+    """Send times of every fix and what each client observed, shared by all tasks.
+
+    A fix is keyed by ``(run_id, latitude, longitude)``; each path point is
+    unique per run, and the server echoes the coordinates it was sent.
+    """
+
+    def __init__(self) -> None:
+        self.sent: dict[tuple[int, float, float], float] = {}
+        self.delivered: set[tuple[int, float, float]] = set()
+        self.fix_to_broadcast: list[float] = []
+        self.fix_to_echo: list[float] = []
+        self.rest: dict[str, list[float]] = defaultdict(list)
+        self.rest_errors: dict[str, int] = defaultdict(int)
+        self.fixes_sent = 0
+        self.broadcasts_received = 0
+        self.driver_errors = 0
+
+    def _latency(self, message: str | bytes) -> tuple[tuple, float] | None:
+        data = json.loads(message)
+        key = (data.get("run_id"), data.get("latitude"), data.get("longitude"))
+        sent_at = self.sent.get(key)
+        if sent_at is None:
+            return None
+        return key, (time.perf_counter() - sent_at) * 1000
+
+    def viewer_message(self, message: str | bytes) -> None:
+        self.broadcasts_received += 1
+        observed = self._latency(message)
+        if observed:
+            self.delivered.add(observed[0])
+            self.fix_to_broadcast.append(observed[1])
+
+    def driver_message(self, message: str | bytes) -> None:
+        if "error" in json.loads(message):
+            self.driver_errors += 1
+            return
+        observed = self._latency(message)
+        if observed:
+            self.delivered.add(observed[0])
+            self.fix_to_echo.append(observed[1])
+
+
+def ws_url(base_url: str, path: str) -> str:
+    return base_url.replace("http", "ws", 1) + path
+
+
+async def login(http: httpx.AsyncClient, email: str, attempts: int = 20) -> str:
+    """Sign in through ``POST /login`` and return the session cookie, backing off on 503."""
+    for _ in range(attempts):
+        response = await http.post("/login", data={"email": email, "password": PASSWORD})
+        if response.status_code == 303:
+            return response.cookies[SESSION_COOKIE]
+        if response.status_code != 503:
+            raise RuntimeError(f"Login failed for {email}: HTTP {response.status_code}")
+        await asyncio.sleep(float(response.headers.get("retry-after", "1")))
+    raise RuntimeError(f"Login for {email} kept getting HTTP 503")
+
+
+async def login_all(base_url: str, emails: list[str], concurrency: int = 8) -> list[str]:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(http: httpx.AsyncClient, email: str) -> str:
+        async with slots:
+            return await login(http, email)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as http:
+        return await asyncio.gather(*(one(http, email) for email in emails))
+
+
+async def _read(ws, handle) -> None:
+    async for message in ws:
+        handle(message)
+
+
+async def drive(base_url: str, cookie: str, bus: Bus, fixes: int, interval: float, recorder: Recorder) -> None:
+    """Stream ``fixes`` fixes along the bus's stops, one every ``interval`` seconds."""
+    headers = {"Cookie": f"{SESSION_COOKIE}={cookie}"}
+    async with connect(ws_url(base_url, f"/ws/gps/{bus.run_id}"), additional_headers=headers) as ws:
+        reader = asyncio.create_task(_read(ws, recorder.driver_message))
+        # Spread buses across the interval instead of sending in lockstep.
+        await asyncio.sleep(random.uniform(0, interval))
+        for lat, lon in bus.path(fixes):
+            recorder.sent[(bus.run_id, lat, lon)] = time.perf_counter()
+            await ws.send(json.dumps({"latitude": lat, "longitude": lon, "speed_kmh": 30.0}))
+            recorder.fixes_sent += 1
+            await asyncio.sleep(interval)
+        reader.cancel()
+
+
+async def watch(base_url: str, cookie: str, recorder: Recorder, ready: asyncio.Event) -> None:
+    """Watch every active run over ``/ws/watch`` until cancelled."""
+    headers = {"Cookie": f"{SESSION_COOKIE}={cookie}"}
+    async with connect(ws_url(base_url, "/ws/watch"), additional_headers=headers, max_queue=None) as ws:
+        ready.set()
+        await _read(ws, recorder.viewer_message)
+
+
+async def poll(base_url: str, cookie: str, route_ids: list[int], interval: float, recorder: Recorder) -> None:
+    """Load the dashboard, active runs and a random route in turn until cancelled."""
+    rng = random.Random()
+    async with httpx.AsyncClient(base_url=base_url, cookies={SESSION_COOKIE: cookie}, timeout=30) as http:
+        while True:
+            for name, path in (
+                ("dashboard", "/"),
+                ("runs", "/runs/?status=active&limit=100"),
+                ("route", f"/routes/{rng.choice(route_ids)}"),
+            ):
+                started = time.perf_counter()
+                response = await http.get(path)
+                if response.status_code >= 400:
+                    recorder.rest_errors[name] += 1
+                else:
+                    recorder.rest[name].append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(interval)
@@ -0,0 +1,58 @@
+"""Compare two saved fleet benchmark results, fleet size by fleet size.
+
+Usage: python -m benchmarks.fleet.compare baseline.json candidate.json
+"""
+import argparse
+import json
+
+
+METRICS = (
+    ("fixes/s", lambda r: r["fixes_per_s"]),
+    ("broadcasts/s", lambda r: r["broadcasts_per_s"]),
+    ("fix p50 ms", lambda r: r["fix_to_broadcast"]["p50_ms"]),
+    ("fix p95 ms", lambda r: r["fix_to_broadcast"]["p95_ms"]),
+    ("fix p99 ms", lambda r: r["fix_to_broadcast"]["p99_ms"]),
+    ("dashboard p95 ms", lambda r: r["rest"].get("dashboard", {}).get("p95_ms")),
+    ("rows/s", lambda r: r["db_positions_per_s"]),
+    ("undelivered", lambda r: r["fixes_undelivered"]),
+    ("rss MiB", lambda r: (r["memory_after"] or {}).get("rss_mb")),
+)
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as report_file:
+        report = json.load(report_file)
+    if report.get("benchmark") != "fleet":
+        raise SystemExit(f"{path} is not a fleet benchmark result")
+    return report
+
+
+def describe(report: dict) -> str:
+    return " ".join(str(part) for part in (report.get("label"), report.get("revision"), report["created_at"]) if part)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+    baseline, candidate = load(args.baseline), load(args.candidate)
+
+    print(f"baseline:  {describe(baseline)}")
+    print(f"candidate: {describe(candidate)}")
+    if baseline["config"] != candidate["config"]:
+        print("warning: the runs used different settings; compare with care")
+    by_size = {result["buses"]: result for result in baseline["results"]}
+    for result in candidate["results"]:
+        before = by_size.get(result["buses"])
+        if before is None:
+            continue
+        print(f"\n{result['buses']} buses")
+        for name, metric in METRICS:
+            old, new = metric(before), metric(result)
+            change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else ""
+            print(f"  {name:<18}{old if old is not None else '-':>10}{new if new is not None else '-':>10}{change:>9}")
+
+
+if __name__ == "__main__":
+    main()
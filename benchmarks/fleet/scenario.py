@@ -0,0 +1,113 @@
+import math
+import random
+import secrets
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+
+from app.database import SessionLocal
+from app.models import Driver, Route, Run, RunPosition, Stop
+from app.utils.passwords import hash_password
+
+
+PASSWORD = "fleet-bench"
+
+# Roughly metres per degree of latitude; longitude is scaled by cos(lat).
+_METERS_PER_DEGREE = 111_320.0
+
+
+@dataclass(frozen=True, slots=True)
+class Bus:
+    driver_email: str
+    run_id: int
+    route_id: int
+    stops: tuple[tuple[float, float], ...]
+
+    def path(self, fixes: int) -> list[tuple[float, float]]:
+        """``fixes`` points evenly spaced along the stop sequence, first to last stop."""
+        segments = len(self.stops) - 1
+        points = []
+        for i in range(fixes):
+            position = segments * i / max(1, fixes - 1)
+            index = min(int(position), segments - 1)
+            frac = position - index
+            (lat1, lon1), (lat2, lon2) = self.stops[index], self.stops[index + 1]
+            points.append((round(lat1 + (lat2 - lat1) * frac, 7), round(lon1 + (lon2 - lon1) * frac, 7)))
+        return points
+
+
+def _stop_sequence(rng: random.Random, origin: tuple[float, float], stops: int, spacing_m: float) -> list[tuple[float, float]]:
+    # A gently wandering line, so consecutive stops are ``spacing_m`` apart
+    # and progress along the route is monotonic.
+    lat, lon = origin
+    heading = rng.uniform(0, 2 * math.pi)
+    points = [(lat, lon)]
+    for _ in range(stops - 1):
+        heading += rng.uniform(-0.4, 0.4)
+        lat += spacing_m * math.cos(heading) / _METERS_PER_DEGREE
+        lon += spacing_m * math.sin(heading) / (_METERS_PER_DEGREE * math.cos(math.radians(lat)))
+        points.append((round(lat, 7), round(lon, 7)))
+    return points
+
+
+def build_fleet(buses: int, stops: int = 20, spacing_m: float = 400.0, seed: int = 7) -> list[Bus]:
+    """Insert ``buses`` drivers, each with a route and an active run over ``stops`` stops.
+
+    Rows are tagged with a random prefix rather than replacing existing data,
+    so the same database can be shared with an already running server.
+    """
+    rng = random.Random(seed)
+    tag = secrets.token_hex(3)
+    password_hash = hash_password(PASSWORD)
+    started_at = datetime.utcnow()
+    emails = [f"fleet-{tag}-{n}@example.com" for n in range(buses)]
+    with SessionLocal() as db:
+        driver_ids = db.scalars(
+            insert(Driver).returning(Driver.id, sort_by_parameter_order=True),
+            [{"name": f"Fleet Driver {n}", "email": email, "password_hash": password_hash} for n, email in enumerate(emails)],
+        ).all()
+        sequences = [
+            _stop_sequence(rng, (40.0 + rng.uniform(-0.2, 0.2), -75.0 + rng.uniform(-0.2, 0.2)), stops, spacing_m)
+            for _ in range(buses)
+        ]
+        route_ids = db.scalars(
+            insert(Route).returning(Route.id, sort_by_parameter_order=True),
+            [
+                {
+                    "name": f"Fleet Route {n}",
+                    "code": f"F{tag}-{n}",
+                    "driver_id": driver_id,
+                    "start_latitude": sequence[0][0],
+                    "start_longitude": sequence[0][1],
+                    "end_latitude": sequence[-1][0],
+                    "end_longitude": sequence[-1][1],
+                }
+                for n, (driver_id, sequence) in enumerate(zip(driver_ids, sequences))
+            ],
+        ).all()
+        run_ids = db.scalars(
+            insert(Run).returning(Run.id, sort_by_parameter_order=True),
+            [
+                {"route_id": route_id, "driver_id": driver_id, "status": "active", "started_at": started_at}
+                for route_id, driver_id in zip(route_ids, driver_ids)
+            ],
+        ).all()
+        db.execute(
+            insert(Stop),
+            [
+                {"run_id": run_id, "name": f"Stop {i + 1}", "sequence": i + 1, "latitude": lat, "longitude": lon}
+                for run_id, sequence in zip(run_ids, sequences)
+                for i, (lat, lon) in enumerate(sequence)
+            ],
+        )
+        db.commit()
+    return [
+        Bus(email, run_id, route_id, tuple(sequence))
+        for email, run_id, route_id, sequence in zip(emails, run_ids, route_ids, sequences)
+    ]
+
+
+def position_count() -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(RunPosition))
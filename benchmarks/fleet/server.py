@@ -0,0 +1,57 @@
+import os
+import socket
+import threading
+import time
+
+import uvicorn
+
+
+class InProcessServer:
+    """``app.main:app`` under uvicorn on a background thread and an ephemeral port.
+
+    Clients run on the caller's event loop in the same process, so they share
+    the GIL with the server; numbers are comparable across versions, not with
+    a dedicated server host.
+    """
+
+    def __init__(self, host: str = "127.0.0.1") -> None:
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, 0))
+        port = self._socket.getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        config = uvicorn.Config("app.main:app", log_level="warning", ws="websockets", lifespan="on")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True)
+
+    @property
+    def pid(self) -> int:
+        return os.getpid()
+
+    def start(self, timeout: float = 30) -> None:
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("In-process server failed to start")
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=30)
+        self._socket.close()
+
+
+def process_memory(pid: int | None) -> dict[str, float] | None:
+    """Resident and peak resident set size of ``pid`` in MiB, from ``/proc`` (Linux only)."""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status_file:
+            fields = dict(line.split(":", 1) for line in status_file if ":" in line)
+    except OSError:
+        return None
+    return {
+        "rss_mb": round(int(fields["VmRSS"].split()[0]) / 1024, 1),
+        "peak_rss_mb": round(int(fields["VmHWM"].split()[0]) / 1024, 1),
+    }
@@ -0,0 +1,145 @@
+"""GPS ingest latency with inline SQLAlchemy calls vs. the DB executor.
+
+Simulates N buses each sending fixes on a fixed interval while the position
+buffer flushes in the background, and reports, per fleet size, the p50/p99
+fix latency and the p99 event-loop lag measured by a ticker task. Inline
+database work stalls the loop on every load and flush, so loop lag grows with
+the fleet; the executor keeps the loop free.
+
+Usage: python -m benchmarks.gps_latency [--buses 1 10 50 100] [--fixes 20]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from contextlib import suppress
+
+_tmpdir = tempfile.mkdtemp(prefix="sbt-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+# Measure the full pipeline for every fix rather than the suppression path.
+os.environ.setdefault("GPS_MIN_INTERVAL_SECONDS", "0")
+os.environ.setdefault("GPS_MIN_DISTANCE_METERS", "0")
+
+from app import models  # noqa: E402,F401
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Driver, Route, Run, Stop  # noqa: E402
+from app.routers.run import _ingest_gps_fix  # noqa: E402
+from app.utils.db_executor import DBExecutor, _call_with_session  # noqa: E402
+from app.utils.ingest import ingest_policy  # noqa: E402
+from app.utils.position_buffer import position_buffer  # noqa: E402
+from app.utils.run_geometry import run_geometry_cache  # noqa: E402
+
+
+class InlineExecutor:
+    """Same interface as ``DBExecutor`` but runs the work on the event loop."""
+
+    async def run(self, fn, *args):
+        return _call_with_session(fn, args)
+
+    def shutdown(self) -> None:
+        pass
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build_fleet(buses: int, stops_per_run: int = 20) -> list[int]:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        driver = Driver(name="Bench", email="bench@sbt.local", password_hash="x")
+        db.add(driver)
+        db.flush()
+        run_ids = []
+        for bus in range(buses):
+            route = Route(name=f"Route {bus}", code=f"R{bus}", driver_id=driver.id)
+            db.add(route)
+            db.flush()
+            run = Run(route_id=route.id, driver_id=driver.id, status="active")
+            db.add(run)
+            db.flush()
+            for seq in range(stops_per_run):
+                db.add(
+                    Stop(
+                        run_id=run.id,
+                        name=f"Stop {seq}",
+                        sequence=seq,
+                        latitude=40.0 + bus * 0.01 + seq * 0.001,
+                        longitude=-75.0 + seq * 0.001,
+                    )
+                )
+            run_ids.append(run.id)
+        db.commit()
+    return run_ids
+
+
+async def loop_lag_probe(samples: list[float], stop: asyncio.Event, interval: float = 0.005) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+
+async def bus(run_id: int, fixes: int, interval: float, executor, latencies: list[float]) -> None:
+    for i in range(fixes):
+        lat, lon = 40.0 + i * 0.0005, -75.0 + i * 0.0005
+        started = time.perf_counter()
+        await _ingest_gps_fix(executor, run_id, lat, lon, 30.0)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+
+
+async def measure(run_ids: list[int], fixes: int, interval: float, mode: str) -> dict:
+    executor = DBExecutor() if mode == "executor" else InlineExecutor()
+    run_geometry_cache.clear()
+    for run_id in run_ids:
+        ingest_policy.forget(run_id)
+    latencies: list[float] = []
+    lag: list[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(loop_lag_probe(lag, stop))
+    flusher = asyncio.create_task(position_buffer.run_periodic_flush(executor, interval))
+    await asyncio.gather(*(bus(run_id, fixes, interval, executor, latencies) for run_id in run_ids))
+    stop.set()
+    flusher.cancel()
+    with suppress(asyncio.CancelledError):
+        await flusher
+    await probe
+    await executor.run(position_buffer.flush)
+    executor.shutdown()
+    return {
+        "mode": mode,
+        "buses": len(run_ids),
+        "fix_p50_ms": round(statistics.median(latencies), 2),
+        "fix_p99_ms": round(percentile(latencies, 99), 2),
+        "loop_lag_p99_ms": round(percentile(lag, 99), 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buses", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--fixes", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between fixes per bus")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'buses':>6}{'fix p50':>10}{'fix p99':>10}{'loop lag p99':>14}")
+    for buses in args.buses:
+        run_ids = build_fleet(buses)
+        for mode in ("inline", "executor"):
+            result = asyncio.run(measure(run_ids, args.fixes, args.interval, mode))
+            print(
+                f"{result['mode']:<10}{result['buses']:>6}{result['fix_p50_ms']:>10}"
+                f"{result['fix_p99_ms']:>10}{result['loop_lag_p99_ms']:>14}"
+            )
+
+
+if __name__ == "__main__":
+    main()
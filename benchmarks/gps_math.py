@@ -0,0 +1,62 @@
+"""Scalar vs. NumPy nearest-stop computation.
+
+Times ``compute_nearest_index`` (pure Python loop) against
+``compute_nearest_index_batch`` for one bus, and a per-bus loop against
+``compute_nearest_indices_batch`` for a whole fleet, at several run sizes.
+
+Usage: python -m benchmarks.gps_math [--stops 10 100 1000] [--buses 300]
+"""
+import argparse
+import random
+import timeit
+
+import numpy as np
+
+from app.utils.gps import compute_nearest_index, compute_nearest_index_batch, compute_nearest_indices_batch
+
+
+def make_run(rng: random.Random, stops: int) -> tuple[np.ndarray, np.ndarray]:
+    lats = np.array([40.0 + rng.random() * 0.2 for _ in range(stops)])
+    lons = np.array([-75.0 + rng.random() * 0.2 for _ in range(stops)])
+    return lats, lons
+
+
+def best_of(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stops", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--buses", type=int, default=300)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    print(f"{'stops':>6}{'scalar 1 bus':>15}{'numpy 1 bus':>14}{'scalar fleet':>15}{'numpy fleet':>14}   (microseconds)")
+    for stops in args.stops:
+        lats, lons = make_run(rng, stops)
+        lat_list, lon_list = lats.tolist(), lons.tolist()
+        number = max(1, 20_000 // stops)
+        scalar_one = best_of(lambda: compute_nearest_index(40.1, -74.9, lat_list, lon_list), number)
+        numpy_one = best_of(lambda: compute_nearest_index_batch(40.1, -74.9, lats, lons), number)
+
+        runs = [make_run(rng, stops) for _ in range(args.buses)]
+        run_lists = [(a.tolist(), b.tolist()) for a, b in runs]
+        bus_lats = [40.1] * args.buses
+        bus_lons = [-74.9] * args.buses
+        stop_lats = [a for a, _ in runs]
+        stop_lons = [b for _, b in runs]
+        fleet_number = max(1, number // args.buses)
+        scalar_fleet = best_of(
+            lambda: [compute_nearest_index(40.1, -74.9, a, b) for a, b in run_lists],
+            fleet_number,
+        )
+        numpy_fleet = best_of(
+            lambda: compute_nearest_indices_batch(bus_lats, bus_lons, stop_lats, stop_lons),
+            fleet_number,
+        )
+        print(f"{stops:>6}{scalar_one:>15.1f}{numpy_one:>14.1f}{scalar_fleet:>15.1f}{numpy_fleet:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
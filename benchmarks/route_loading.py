@@ -0,0 +1,163 @@
+"""Nested route loading: chained joinedload vs. selectinload vs. headers only.
+
+Builds routes with 5 schools, 20 runs and 40 stops per run, then times a
+page of ``list_routes``-style loads three ways: the old single query with
+``joinedload(Route.schools)`` and ``joinedload(Route.runs).joinedload(Run.stops)``,
+the ``selectinload`` options the router uses now, and ``include=`` (route
+headers only). Each timing covers the query plus ``RouteOut`` serialization;
+"joined rows" is the size of the cartesian result the joinedload query
+makes SQLite return.
+
+Usage: python -m benchmarks.route_loading [--routes 10 50] [--schools 5] [--runs 20] [--stops 40]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp(prefix="sbt-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+
+from sqlalchemy import event, func, insert, select  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import Driver, Route, Run, School, Stop  # noqa: E402
+from app.models.associations import route_school_association  # noqa: E402
+from app.routers.route import FULL_EXPANSION, RouteExpansion, _route_options, _to_route_out, _to_route_payload  # noqa: E402
+
+
+def build(routes: int, schools: int, runs: int, stops: int) -> None:
+    rng = random.Random(7)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        driver = Driver(name="Bench", email="bench@example.com", password_hash="x")
+        db.add(driver)
+        db.flush()
+        school_ids = db.scalars(
+            insert(School).returning(School.id),
+            [{"name": f"School {i}", "address": "1 Main St"} for i in range(routes * schools)],
+        ).all()
+        route_ids = db.scalars(
+            insert(Route).returning(Route.id),
+            [{"name": f"Route {i}", "code": f"R{i:04d}", "driver_id": driver.id} for i in range(routes)],
+        ).all()
+        db.execute(
+            insert(route_school_association),
+            [
+                {"route_id": route_id, "school_id": school_ids[n * schools + i]}
+                for n, route_id in enumerate(route_ids)
+                for i in range(schools)
+            ],
+        )
+        run_ids = db.scalars(
+            insert(Run).returning(Run.id),
+            [{"route_id": route_id, "driver_id": driver.id} for route_id in route_ids for _ in range(runs)],
+        ).all()
+        db.execute(
+            insert(Stop),
+            [
+                {
+                    "run_id": run_id,
+                    "name": f"Stop {i}",
+                    "sequence": i,
+                    "latitude": 40 + rng.random() * 0.2,
+                    "longitude": -75 + rng.random() * 0.2,
+                }
+                for run_id in run_ids
+                for i in range(stops)
+            ],
+        )
+        db.commit()
+
+
+def joined_row_count(page: int) -> int:
+    route_ids = select(Route.id).order_by(Route.id).limit(page).scalar_subquery()
+    stmt = (
+        select(func.count())
+        .select_from(Route)
+        .outerjoin(route_school_association, route_school_association.c.route_id == Route.id)
+        .outerjoin(Run, Run.route_id == Route.id)
+        .outerjoin(Stop, Stop.run_id == Run.id)
+        .where(Route.id.in_(route_ids))
+    )
+    with SessionLocal() as db:
+        return db.scalar(stmt)
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.queries = 0
+        event.listen(engine, "after_cursor_execute", self._count)
+
+    def _count(self, *args) -> None:
+        self.queries += 1
+
+    def close(self) -> None:
+        event.remove(engine, "after_cursor_execute", self._count)
+
+
+def time_load(load, repeat: int) -> tuple[float, int]:
+    counter = QueryCounter()
+    best = float("inf")
+    try:
+        for _ in range(repeat):
+            counter.queries = 0
+            start = time.perf_counter()
+            with SessionLocal() as db:
+                load(db)
+            best = min(best, time.perf_counter() - start)
+    finally:
+        counter.close()
+    return best * 1000, counter.queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--schools", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--stops", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    headers_only = RouteExpansion(include=frozenset())
+
+    def joined(db, page):
+        stmt = (
+            select(Route)
+            .order_by(Route.id)
+            .limit(page)
+            .options(joinedload(Route.schools), joinedload(Route.runs).joinedload(Run.stops))
+        )
+        for route in db.execute(stmt).scalars().unique():
+            _to_route_out(route).model_dump_json()
+
+    def selectin(db, page):
+        stmt = select(Route).order_by(Route.id).limit(page).options(*_route_options(FULL_EXPANSION.include))
+        for route in db.execute(stmt).scalars():
+            _to_route_out(route).model_dump_json()
+
+    def headers(db, page):
+        stmt = select(Route).order_by(Route.id).limit(page).options(*_route_options(headers_only.include))
+        for route in db.execute(stmt).scalars():
+            _to_route_payload(route, headers_only)
+
+    print(f"{args.schools} schools, {args.runs} runs, {args.stops} stops per run")
+    print(f"{'routes':>7}{'joined rows':>13}{'joinedload':>12}{'selectin':>12}{'headers':>10}{'queries (j/s/h)':>18}   (ms)")
+    for routes in args.routes:
+        build(routes, args.schools, args.runs, args.stops)
+        rows = joined_row_count(routes)
+        joined_ms, joined_queries = time_load(lambda db: joined(db, routes), args.repeat)
+        selectin_ms, selectin_queries = time_load(lambda db: selectin(db, routes), args.repeat)
+        headers_ms, headers_queries = time_load(lambda db: headers(db, routes), args.repeat)
+        print(
+            f"{routes:>7}{rows:>13}{joined_ms:>12.1f}{selectin_ms:>12.1f}{headers_ms:>10.1f}"
+            f"{f'{joined_queries}/{selectin_queries}/{headers_queries}':>18}"
+        )
+
+
+if __name__ == "__main__":
+    main()
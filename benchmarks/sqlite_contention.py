@@ -0,0 +1,170 @@
+"""SQLite contention: GPS flush writers vs. dashboard readers, per engine profile.
+
+Writer threads each own a ``PositionBuffer`` for a slice of the fleet and
+flush a fresh fix for every bus on a fixed interval, the same UPDATE plus
+history INSERT the app commits. Reader threads recompute the dashboard
+snapshot (uncached) in a loop. Under the ``default`` profile readers and the
+writer share one pool and serialize on the rollback journal; under ``wal``
+readers use a separate ``query_only`` pool and run alongside commits.
+Reported per profile: flush and dashboard throughput, p50/p99 latency, and
+operations that failed with ``database is locked``.
+
+Usage: python -m benchmarks.sqlite_contention [--buses 200] [--writers 2] [--readers 4] [--seconds 5]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+_tmpdir = tempfile.mkdtemp(prefix="sbt-bench-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmpdir}/bench.db")
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import models  # noqa: E402,F401
+from app.database import DATABASE_PROFILES, Base, build_engine  # noqa: E402
+from app.models import Driver, Route, Run, School, Student  # noqa: E402
+from app.utils.dashboard_metrics import compute_dashboard  # noqa: E402
+from app.utils.position_buffer import PositionBuffer  # noqa: E402
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def build(engine, buses: int, students_per_route: int) -> list[int]:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        driver = Driver(name="Bench", email="bench@example.com", password_hash="x")
+        db.add(driver)
+        db.flush()
+        school_id = db.scalar(insert(School).returning(School.id), {"name": "Bench School", "address": "1 Main St"})
+        route_ids = db.scalars(
+            insert(Route).returning(Route.id, sort_by_parameter_order=True),
+            [{"name": f"Route {i}", "code": f"R{i:04d}", "driver_id": driver.id} for i in range(buses)],
+        ).all()
+        db.execute(
+            insert(Student),
+            [
+                {"first_name": f"S{n}", "last_name": f"R{route_id}", "route_id": route_id, "school_id": school_id}
+                for route_id in route_ids
+                for n in range(students_per_route)
+            ],
+        )
+        run_ids = db.scalars(
+            insert(Run).returning(Run.id, sort_by_parameter_order=True),
+            [{"route_id": route_id, "driver_id": driver.id, "status": "active"} for route_id in route_ids],
+        ).all()
+        db.commit()
+    return list(run_ids)
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.locked = 0
+        self._lock = threading.Lock()
+
+    def record(self, started: float) -> None:
+        with self._lock:
+            self.latencies.append((time.perf_counter() - started) * 1000)
+
+    def fail(self) -> None:
+        with self._lock:
+            self.locked += 1
+
+
+def writer(write_session, run_ids: list[int], interval: float, deadline: float, stats: Stats) -> None:
+    buffer = PositionBuffer()
+    tick = 0
+    base = datetime(2024, 1, 1)
+    while time.perf_counter() < deadline:
+        tick += 1
+        for n, run_id in enumerate(run_ids):
+            buffer.record(run_id, 40.0 + tick * 1e-5, -75.0 + n * 1e-4, 30.0, base + timedelta(seconds=tick))
+        started = time.perf_counter()
+        with write_session() as db:
+            try:
+                buffer.flush(db)
+                stats.record(started)
+            except OperationalError:
+                stats.fail()
+        time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+def reader(read_session, deadline: float, stats: Stats) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        with read_session() as db:
+            try:
+                compute_dashboard(db)
+                stats.record(started)
+            except OperationalError:
+                stats.fail()
+
+
+def measure(profile: str, args) -> dict:
+    url = f"sqlite:///{_tmpdir}/contention-{profile}.db"
+    write_engine = build_engine(url, profile)
+    read_engine = build_engine(url, profile, read_only=True) if profile == "wal" else write_engine
+    run_ids = build(write_engine, args.buses, args.students)
+    write_session = sessionmaker(bind=write_engine)
+    read_session = sessionmaker(bind=read_engine)
+
+    writes, reads = Stats(), Stats()
+    deadline = time.perf_counter() + args.seconds
+    slices = [run_ids[i :: args.writers] for i in range(args.writers)]
+    threads = [threading.Thread(target=writer, args=(write_session, s, args.interval, deadline, writes)) for s in slices]
+    threads += [threading.Thread(target=reader, args=(read_session, deadline, reads)) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    write_engine.dispose()
+    read_engine.dispose()
+
+    return {
+        "profile": profile,
+        "flush_per_s": len(writes.latencies) / args.seconds,
+        "flush_p50": statistics.median(writes.latencies) if writes.latencies else 0.0,
+        "flush_p99": percentile(writes.latencies, 99),
+        "dash_per_s": len(reads.latencies) / args.seconds,
+        "dash_p50": statistics.median(reads.latencies) if reads.latencies else 0.0,
+        "dash_p99": percentile(reads.latencies, 99),
+        "locked": writes.locked + reads.locked,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--buses", type=int, default=200)
+    parser.add_argument("--students", type=int, default=25, help="students per route")
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between flushes per writer")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--profiles", nargs="+", choices=DATABASE_PROFILES, default=list(DATABASE_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.buses} buses, {args.writers} writers every {args.interval}s, {args.readers} dashboard readers")
+    print(f"{'profile':<9}{'flush/s':>9}{'p50':>8}{'p99':>9}{'dash/s':>9}{'p50':>8}{'p99':>9}{'locked':>8}   (ms)")
+    for profile in args.profiles:
+        r = measure(profile, args)
+        print(
+            f"{r['profile']:<9}{r['flush_per_s']:>9.1f}{r['flush_p50']:>8.1f}{r['flush_p99']:>9.1f}"
+            f"{r['dash_per_s']:>9.1f}{r['dash_p50']:>8.1f}{r['dash_p99']:>9.1f}{r['locked']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()